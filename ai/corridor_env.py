@@ -81,14 +81,36 @@ def _bootstrap_sumo() -> str:
 
 SUMO_HOME = _bootstrap_sumo()
 
-try:
-    import traci
-    import traci.exceptions
-except ImportError as e:
-    raise ImportError(
-        f"Cannot import traci: {e}\n"
-        f"Ensure SUMO_HOME/tools is in sys.path (SUMO_HOME={SUMO_HOME})"
-    ) from e
+# In-process libsumo backend, as in traffic_env (same ATCS_LIBSUMO switch).
+# sumo-gui needs the socket client, so set ATCS_LIBSUMO=0 for gui=True.
+USE_LIBSUMO = os.environ.get("ATCS_LIBSUMO", "1") == "1"
+if USE_LIBSUMO:
+    try:
+        import libsumo as traci
+    except ImportError:
+        USE_LIBSUMO = False
+
+if not USE_LIBSUMO:
+    try:
+        import traci
+        import traci.exceptions
+    except ImportError as e:
+        raise ImportError(
+            f"Cannot import traci: {e}\n"
+            f"Ensure SUMO_HOME/tools is in sys.path (SUMO_HOME={SUMO_HOME})"
+        ) from e
+
+tc = traci.constants
+
+# Variables subscribed per incoming lane / walking area / corridor link, read
+# back with getSubscriptionResults (see CorridorEnv._subscribe_metrics)
+_LANE_VARS = (tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+              tc.LAST_STEP_MEAN_SPEED,
+              tc.VAR_WAITING_TIME)
+_WALK_VARS = (tc.LAST_STEP_PERSON_ID_LIST,)
+_LINK_VARS = (tc.LAST_STEP_OCCUPANCY,)
+_SIM_VARS  = (tc.VAR_ARRIVED_VEHICLES_NUMBER,
+              tc.VAR_MIN_EXPECTED_VEHICLES)
 
 
 # ── Paths ─────────────────────────────────────────────────────────────────────
@@ -118,6 +140,22 @@ PHASE_NAMES = {
 
 GREEN_PHASES = {NS_THROUGH, NS_LEFT, EW_THROUGH, EW_LEFT, NS_ALL, EW_ALL}
 
+# Per-phase lookups indexed by phase number, replacing tuple-membership tests
+# in the switch / reward paths (same tables as ai/traffic_env):
+#   _YELLOW_OF   — yellow that clears the phase (yellows mirror the old else)
+#   _IS_NS_GREEN — phase counts as N/S green for the green-wave reward
+_YELLOW_OF = (
+    NS_YELLOW,  # NS_THROUGH
+    NS_YELLOW,  # NS_LEFT
+    EW_YELLOW,  # NS_YELLOW
+    EW_YELLOW,  # EW_THROUGH
+    EW_YELLOW,  # EW_LEFT
+    EW_YELLOW,  # EW_YELLOW
+    NS_YELLOW,  # NS_ALL
+    EW_YELLOW,  # EW_ALL
+)
+_IS_NS_GREEN = (True, True, False, False, False, False, True, False)
+
 ACTION_HOLD       = 0
 ACTION_NS_THROUGH = 1
 ACTION_NS_LEFT    = 2
@@ -162,6 +200,19 @@ DECISION_INTERVAL  = 5
 MIN_GREEN_THROUGH  = 10
 MIN_GREEN_LEFT     = 8
 YELLOW_DURATION    = 3
+
+# Minimum green per phase number (left arrows hold shorter); yellow entries
+# mirror the old else-branch, _can_switch rejects yellows first.
+_MIN_GREEN_OF = (
+    MIN_GREEN_THROUGH,  # NS_THROUGH
+    MIN_GREEN_LEFT,     # NS_LEFT
+    MIN_GREEN_THROUGH,  # NS_YELLOW
+    MIN_GREEN_THROUGH,  # EW_THROUGH
+    MIN_GREEN_LEFT,     # EW_LEFT
+    MIN_GREEN_THROUGH,  # EW_YELLOW
+    MIN_GREEN_THROUGH,  # NS_ALL
+    MIN_GREEN_THROUGH,  # EW_ALL
+)
 SIM_DURATION       = 7200
 
 # Warm-start expert (per junction) — protected-left sustained greens, mirroring
@@ -414,6 +465,11 @@ class CorridorEnv:
         info    = {jid: dict}
     """
 
+    # Per-TL phase state strings of the network's own programs (None = no
+    # program).  Fixed by the network, so getAllProgramLogics is queried on
+    # the first reset only, not once per junction per episode.
+    _tl_phase_states: dict[str, tuple[str, ...] | None] = {}
+
     def __init__(self, gui: bool = False, verbose: bool = False,
                  route_file: str | None = None):
         self.gui        = gui
@@ -432,6 +488,16 @@ class CorridorEnv:
         # used by the warm-start expert.
         self._expert_lanes_cache: dict[str, tuple] = {}
 
+        # Set per reset() by _subscribe_metrics
+        self._edge_lanes: dict[str, list[str]] = {}  # edge → vehicle lanes (no sidewalk)
+        self._walk_idx: dict[str, list[tuple[int, str]]] = {}  # jid → subscribed walking areas
+        self._links_subscribed: set[str] = set()
+
+        # Per-junction state buffers, filled in place by _build_state
+        self._state_bufs: dict[str, np.ndarray] = {
+            jid: np.zeros(STATE_SIZE, dtype=np.float32) for jid in JUNCTION_IDS
+        }
+
         # Per-episode stats
         self.total_arrived: int = 0
         self.episode_rewards: dict[str, list[float]] = {jid: [] for jid in JUNCTION_IDS}
@@ -447,6 +513,7 @@ class CorridorEnv:
         # Configure AI control for all 3 traffic lights
         for jid in JUNCTION_IDS:
             self._configure_tl(jid)
+        self._subscribe_metrics()
 
         # Reset bookkeeping
         self._sim_step = 0
@@ -489,25 +556,37 @@ class CorridorEnv:
         # ── Advance DECISION_INTERVAL simulation steps ───────────────────────
         block_arrived = 0
 
-        for _ in range(DECISION_INTERVAL):
-            # Handle yellow countdowns for all junctions
+        if not any(self._jstate[jid].in_yellow for jid in JUNCTION_IDS):
+            # No yellow to tick down at any junction: advance the whole block
+            # with one simulationStep(t) call; the arrived count covers the
+            # full jump.
+            traci.simulationStep(self._sim_step + DECISION_INTERVAL)
+            self._sim_step += DECISION_INTERVAL
             for jid in JUNCTION_IDS:
-                js = self._jstate[jid]
-                if js.in_yellow:
-                    js.yellow_countdown -= 1
-                    if js.yellow_countdown <= 0:
-                        self._complete_switch(jid)
+                self._jstate[jid].phase_timer += DECISION_INTERVAL
+            block_arrived = traci.simulation.getSubscriptionResults()[
+                tc.VAR_ARRIVED_VEHICLES_NUMBER]
+        else:
+            for _ in range(DECISION_INTERVAL):
+                # Handle yellow countdowns for all junctions
+                for jid in JUNCTION_IDS:
+                    js = self._jstate[jid]
+                    if js.in_yellow:
+                        js.yellow_countdown -= 1
+                        if js.yellow_countdown <= 0:
+                            self._complete_switch(jid)
 
-            traci.simulationStep()
-            self._sim_step += 1
+                traci.simulationStep()
+                self._sim_step += 1
 
-            for jid in JUNCTION_IDS:
-                self._jstate[jid].phase_timer += 1
+                for jid in JUNCTION_IDS:
+                    self._jstate[jid].phase_timer += 1
 
-            block_arrived += traci.simulation.getArrivedNumber()
+                sim = traci.simulation.getSubscriptionResults()
+                block_arrived += sim[tc.VAR_ARRIVED_VEHICLES_NUMBER]
 
-            if traci.simulation.getMinExpectedNumber() == 0:
-                break
+                if sim[tc.VAR_MIN_EXPECTED_VEHICLES] == 0:
+                    break
 
         # ── Collect metrics and compute rewards ──────────────────────────────
         self.total_arrived += block_arrived
@@ -532,8 +611,7 @@ class CorridorEnv:
 
             # Check flicker
             action = actions.get(jid, ACTION_HOLD)
-            min_g = (MIN_GREEN_LEFT if js.phase in (NS_LEFT, EW_LEFT)
-                     else MIN_GREEN_THROUGH)
+            min_g = _MIN_GREEN_OF[js.phase]
 
             # Per-junction reward
             r_local = self._compute_local_reward(
@@ -553,7 +631,7 @@ class CorridorEnv:
             reward = r_local + r_corridor
             js.prev_total_queue = total_q
 
-            avg_wait = float(np.mean(waits)) if waits else 0.0
+            avg_wait = sum(waits) / len(waits) if waits else 0.0
             self.episode_rewards[jid].append(reward)
             self.episode_waits[jid].append(avg_wait)
 
@@ -573,7 +651,8 @@ class CorridorEnv:
 
         done = (
             self._sim_step >= SIM_DURATION
-            or traci.simulation.getMinExpectedNumber() == 0
+            or traci.simulation.getSubscriptionResults()[
+                tc.VAR_MIN_EXPECTED_VEHICLES] == 0
         )
 
         return states, rewards, done, infos
@@ -609,75 +688,60 @@ class CorridorEnv:
         cfg = JUNCTIONS[jid]
         js  = self._jstate[jid]
 
-        # Per-lane metrics (padded to MAX_LANES=8)
-        lane_m = self._collect_lane_metrics(jid)
-        n_lanes = len(cfg.incoming_lanes)
+        # Filled in place (layout in the module docstring) instead of building
+        # ten temporaries and concatenating them.
+        buf = self._state_bufs[jid]
 
-        lq = np.zeros(MAX_LANES, dtype=np.float32)
-        ls = np.zeros(MAX_LANES, dtype=np.float32)
-        lw = np.zeros(MAX_LANES, dtype=np.float32)
+        # Per-lane metrics straight from the subscriptions (padded to
+        # MAX_LANES=8 — the padding slots are never written and stay 0)
+        sub = traci.lane.getSubscriptionResults
         for i, lid in enumerate(cfg.incoming_lanes):
-            m = lane_m[lid]
-            lq[i] = m["queue"]
-            ls[i] = m["speed"]
-            lw[i] = m["wait"]
+            r = sub(lid)
+            buf[i]      = r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            buf[8 + i]  = max(0.0, r[tc.LAST_STEP_MEAN_SPEED])
+            buf[16 + i] = r[tc.VAR_WAITING_TIME]
+        buf[0:8]   /= MAX_QUEUE_LANE
+        buf[8:16]  /= MAX_SPEED
+        buf[16:24] /= MAX_WAIT
 
         # Per-approach aggregate queues (4 dims)
         edge_m = self._collect_edge_metrics(jid)
-        approach_q = np.array([edge_m[e]["queue"] for e in cfg.incoming_edges],
-                              dtype=np.float32)
+        buf[24:28] = [edge_m[e]["queue"] for e in cfg.incoming_edges]
+        buf[24:28] /= MAX_QUEUE
 
         # Phase one-hot (8 dims)
-        phase_vec = np.zeros(NUM_PHASES, dtype=np.float32)
-        phase_vec[js.phase] = 1.0
+        buf[28:36] = 0.0
+        buf[28 + js.phase] = 1.0
 
         # Normalised time in phase
-        t_norm = np.float32(min(js.phase_timer / MAX_PHASE_T, 1.0))
+        buf[36] = min(js.phase_timer / MAX_PHASE_T, 1.0)
 
         # Pedestrian counts (4 dims)
-        ped = self._get_ped_counts(jid)
+        buf[37:41] = self._get_ped_counts(jid)
+        buf[37:41] /= MAX_PED_QUEUE
 
-        # Neighbor info (south: 2, north: 2)
+        # Neighbor info (south: 2, north: 2) — zeros at the corridor ends
         south_jid, north_jid = NEIGHBORS[jid]
-
-        def _neighbor_info(nid):
+        for off, nid in ((41, south_jid), (43, north_jid)):
             if nid is None:
-                return np.zeros(2, dtype=np.float32)
-            njs = self._jstate[nid]
+                buf[off:off + 2] = 0.0
+                continue
             ncfg = JUNCTIONS[nid]
             n_edge_m = self._collect_edge_metrics(nid)
             total_q = sum(n_edge_m[e]["queue"] for e in ncfg.incoming_edges)
-            return np.array([
-                min(total_q / MAX_QUEUE, 1.0),
-                njs.phase / 7.0,
-            ], dtype=np.float32)
-
-        south_info = _neighbor_info(south_jid)
-        north_info = _neighbor_info(north_jid)
+            buf[off]     = min(total_q / MAX_QUEUE, 1.0)
+            buf[off + 1] = self._jstate[nid].phase / 7.0
 
         # Corridor link occupancy (max of adjacent links)
         max_occ = 0.0
         for link_edge in [cfg.south_link, cfg.north_link]:
-            if link_edge:
-                try:
-                    occ = traci.edge.getLastStepOccupancy(link_edge)
-                    max_occ = max(max_occ, occ / 100.0)  # occupancy is 0-100%
-                except traci.exceptions.TraCIException:
-                    pass
+            if link_edge in self._links_subscribed:
+                occ = traci.edge.getSubscriptionResults(link_edge)[tc.LAST_STEP_OCCUPANCY]
+                max_occ = max(max_occ, occ / 100.0)  # occupancy is 0-100%
+        buf[45] = max_occ                            # = 46 total (emergency dims removed)
 
-        state = np.concatenate([
-            lq / MAX_QUEUE_LANE,     # 8
-            ls / MAX_SPEED,          # 8
-            lw / MAX_WAIT,           # 8
-            approach_q / MAX_QUEUE,  # 4
-            phase_vec,               # 8
-            [t_norm],                # 1
-            ped / MAX_PED_QUEUE,     # 4
-            south_info,              # 2
-            north_info,              # 2
-            [np.float32(max_occ)],   # 1
-        ])                           # = 46 total (emergency dims removed)
-        return state.astype(np.float32)
+        # Copy out: callers keep (state, next_state) pairs for replay.
+        return buf.copy()
 
     # ── Reward Computation ───────────────────────────────────────────────────
 
@@ -696,19 +760,25 @@ class CorridorEnv:
         # 1. Congestion penalty — normalised by QUEUE_REF (was absolute → diverged)
         r_abs   = -W_QUEUE_ABS * (total_queue / QUEUE_REF)
         # 2. Penalise net queue GROWTH only (no reward for shrinkage)
+        #    (conditional expressions instead of max()/min() calls throughout:
+        #    this runs per junction per step in pure Python)
         delta   = total_queue - prev_total_queue
-        r_delta = -W_QUEUE_DELTA * (max(0.0, delta) / QUEUE_REF)
+        r_delta = -W_QUEUE_DELTA * ((delta if delta > 0.0 else 0.0) / QUEUE_REF)
         # 3. Throughput (accumulated over the DECISION_INTERVAL steps)
         r_thru  = W_ARRIVED * n_arrived
         # 4. Flicker penalty
         r_flick = -W_FLICKER if switched_too_soon else 0.0
 
-        # 5. Balance: lower variance in queue distribution = higher bonus
+        # 5. Balance: lower variance in queue distribution = higher bonus.
+        #    Four approaches per junction, so the std is written out in scalar
+        #    arithmetic rather than paying np.std's dispatch on a 4-item list.
         if total_queue > 0:
-            mean_q    = total_queue / max(len(queue_distribution), 1)
-            std_q     = float(np.std(queue_distribution))
-            balance   = max(0.0, 1.0 - std_q / (mean_q + 1.0))
-            r_balance = W_BALANCE * balance
+            q0, q1, q2, q3 = queue_distribution
+            mean_q    = total_queue * 0.25
+            var_q     = ((q0 - mean_q) * (q0 - mean_q) + (q1 - mean_q) * (q1 - mean_q)
+                         + (q2 - mean_q) * (q2 - mean_q) + (q3 - mean_q) * (q3 - mean_q)) * 0.25
+            balance   = 1.0 - var_q ** 0.5 / (mean_q + 1.0)
+            r_balance = W_BALANCE * (balance if balance > 0.0 else 0.0)
         else:
             r_balance = W_BALANCE
 
@@ -717,17 +787,21 @@ class CorridorEnv:
         r_max_wait = 0.0
         if wait_distribution:
             worst_wait = max(wait_distribution)
-            excess     = max(0.0, worst_wait - FAIR_WAIT_THRESH)
-            r_max_wait = -W_MAX_WAIT * min(excess / WAIT_REF, 3.0)
+            excess     = (worst_wait - FAIR_WAIT_THRESH) / WAIT_REF
+            if excess > 0.0:
+                r_max_wait = -W_MAX_WAIT * (excess if excess < 3.0 else 3.0)
 
         # 7. Pedestrian waiting penalty — normalised + capped
-        r_ped = -W_PED_WAIT * min(n_ped_waiting / PED_REF, 2.0)
+        ped   = n_ped_waiting / PED_REF
+        r_ped = -W_PED_WAIT * (ped if ped < 2.0 else 2.0)
 
         total = (r_abs + r_delta + r_thru
                  + r_flick + r_balance + r_max_wait + r_ped)
         # Clip so cross-scenario Q-targets stay well-conditioned; the corridor
         # coordination reward is added outside this bound (in step()).
-        return float(max(-REWARD_CLIP, min(REWARD_CLIP, total)))
+        if total > REWARD_CLIP:
+            return REWARD_CLIP
+        return total if total > -REWARD_CLIP else -REWARD_CLIP
 
     def _compute_corridor_reward(self, jid: str) -> float:
         """Corridor coordination reward components."""
@@ -745,9 +819,7 @@ class CorridorEnv:
                 continue
             njs = self._jstate[nid]
             # Both need to be in NS-related phases for green wave
-            my_ns = js.phase in (NS_THROUGH, NS_LEFT, NS_ALL)
-            nb_ns = njs.phase in (NS_THROUGH, NS_LEFT, NS_ALL)
-            if my_ns and nb_ns:
+            if _IS_NS_GREEN[js.phase] and _IS_NS_GREEN[njs.phase]:
                 # Check phase offset
                 offset = abs(js.ns_green_start - njs.ns_green_start)
                 if abs(offset - IDEAL_OFFSET) <= OFFSET_TOLERANCE:
@@ -756,13 +828,11 @@ class CorridorEnv:
         # ── Spillback penalty ────────────────────────────────────────────────
         # Penalize if corridor links adjacent to this junction are congested
         for link_edge in [cfg.south_link, cfg.north_link]:
-            if link_edge:
-                try:
-                    occ = traci.edge.getLastStepOccupancy(link_edge) / 100.0
-                    if occ > SPILLBACK_THRESH:
-                        reward -= W_SPILLBACK * (occ - SPILLBACK_THRESH)
-                except traci.exceptions.TraCIException:
-                    pass
+            if link_edge in self._links_subscribed:
+                r   = traci.edge.getSubscriptionResults(link_edge)
+                occ = r[tc.LAST_STEP_OCCUPANCY] / 100.0
+                if occ > SPILLBACK_THRESH:
+                    reward -= W_SPILLBACK * (occ - SPILLBACK_THRESH)
 
         return reward
 
@@ -772,15 +842,13 @@ class CorridorEnv:
         js = self._jstate[jid]
         if js.in_yellow or js.phase not in GREEN_PHASES:
             return False
-        if js.phase in (NS_LEFT, EW_LEFT):
-            return js.phase_timer >= MIN_GREEN_LEFT
-        return js.phase_timer >= MIN_GREEN_THROUGH
+        return js.phase_timer >= _MIN_GREEN_OF[js.phase]
 
     def _initiate_switch(self, jid: str, target_green: int) -> None:
         js  = self._jstate[jid]
         cfg = JUNCTIONS[jid]
 
-        yellow = NS_YELLOW if js.phase in (NS_THROUGH, NS_LEFT, NS_ALL) else EW_YELLOW
+        yellow = _YELLOW_OF[js.phase]
 
         js.next_green = target_green
         traci.trafficlight.setRedYellowGreenState(
@@ -802,12 +870,17 @@ class CorridorEnv:
         js.phase_timer = 0
 
         # Track NS green start time for green-wave reward
-        if js.phase in (NS_THROUGH, NS_LEFT, NS_ALL):
+        if _IS_NS_GREEN[js.phase]:
             js.ns_green_start = float(self._sim_step)
 
     # ── SUMO Management ──────────────────────────────────────────────────────
 
     def _start_sumo(self, seed: int | None = None) -> None:
+        if self.gui and USE_LIBSUMO:
+            raise RuntimeError(
+                "sumo-gui needs the TraCI socket backend — "
+                "set ATCS_LIBSUMO=0 to run with gui=True"
+            )
         binary = "sumo-gui" if self.gui else "sumo"
         bin_path = os.path.join(SUMO_HOME, "bin", binary)
         if not os.path.isfile(bin_path):
@@ -835,14 +908,17 @@ class CorridorEnv:
         cfg = JUNCTIONS[jid]
         tl_id = cfg.tl_id
 
-        logics = traci.trafficlight.getAllProgramLogics(tl_id)
-        if not logics:
+        states = CorridorEnv._tl_phase_states.get(tl_id, ())
+        if states == ():
+            logics = traci.trafficlight.getAllProgramLogics(tl_id)
+            states = tuple(p.state for p in logics[0].phases) if logics else None
+            CorridorEnv._tl_phase_states[tl_id] = states
+        if states is None:
             return
 
-        orig = logics[0]
         long_phases = [
-            traci.trafficlight.Phase(1_000_000, p.state)
-            for p in orig.phases
+            traci.trafficlight.Phase(1_000_000, state)
+            for state in states
         ]
         ai_logic = traci.trafficlight.Logic(
             programID="ai_control", type=0, currentPhaseIndex=0,
@@ -860,51 +936,94 @@ class CorridorEnv:
 
     # ── Metric Collection ────────────────────────────────────────────────────
 
+    def _subscribe_metrics(self) -> None:
+        """
+        Subscribe every lane / walking area / corridor link the env reads, plus
+        the arrived / still-expected vehicle counts, so SUMO pushes the values
+        with each simulationStep and the collectors are dict lookups instead
+        of one getter call each. Subscriptions die with the SUMO process, so
+        this runs once per reset().
+
+        Incoming edges and lanes are validated here (a mismatch raises); walking
+        areas and corridor links stay optional, as before.
+        """
+        self._edge_lanes = {}
+        lanes: set[str] = set()
+        try:
+            for jid in JUNCTION_IDS:
+                cfg = JUNCTIONS[jid]
+                lanes.update(cfg.incoming_lanes)
+                for edge in cfg.incoming_edges:
+                    n_lanes = traci.edge.getLaneNumber(edge)
+                    # skip lane 0 (sidewalk)
+                    self._edge_lanes[edge] = [f"{edge}_{idx}" for idx in range(1, n_lanes)]
+                    lanes.update(self._edge_lanes[edge])
+            for lid in sorted(lanes):
+                traci.lane.subscribe(lid, _LANE_VARS)
+        except traci.exceptions.TraCIException as exc:
+            raise RuntimeError(
+                f"Network does not match the corridor junction config ({exc}) "
+                f"— rebuild with scripts/build_network.py --corridor"
+            ) from exc
+
+        self._walk_idx = {}
+        self._links_subscribed = set()
+        for jid in JUNCTION_IDS:
+            cfg = JUNCTIONS[jid]
+            self._walk_idx[jid] = []
+            for i, wa in enumerate(cfg.walking_areas):
+                try:
+                    traci.edge.subscribe(wa, _WALK_VARS)
+                    self._walk_idx[jid].append((i, wa))
+                except traci.exceptions.TraCIException:
+                    pass
+            for link_edge in (cfg.south_link, cfg.north_link):
+                if link_edge and link_edge not in self._links_subscribed:
+                    try:
+                        traci.edge.subscribe(link_edge, _LINK_VARS)
+                        self._links_subscribed.add(link_edge)
+                    except traci.exceptions.TraCIException:
+                        pass
+
+        traci.simulation.subscribe(_SIM_VARS)
+
     def _collect_lane_metrics(self, jid: str) -> dict[str, dict]:
         cfg = JUNCTIONS[jid]
+        sub = traci.lane.getSubscriptionResults
         result = {}
         for lid in cfg.incoming_lanes:
-            try:
-                q = traci.lane.getLastStepHaltingNumber(lid)
-                s = traci.lane.getLastStepMeanSpeed(lid)
-                w = traci.lane.getWaitingTime(lid)
-            except traci.exceptions.TraCIException:
-                q, s, w = 0, 0.0, 0.0
+            r = sub(lid)
             result[lid] = {
-                "queue": float(q), "speed": max(0.0, float(s)), "wait": float(w),
+                "queue": r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER],
+                "speed": max(0.0, r[tc.LAST_STEP_MEAN_SPEED]),
+                "wait":  r[tc.VAR_WAITING_TIME],
             }
         return result
 
     def _collect_edge_metrics(self, jid: str) -> dict[str, dict]:
         cfg = JUNCTIONS[jid]
+        sub = traci.lane.getSubscriptionResults
         result = {}
         for edge in cfg.incoming_edges:
             total_q = 0
             total_w = 0.0
-            n_lanes = 0
-            try:
-                n_lanes = traci.edge.getLaneNumber(edge)
-                for idx in range(1, n_lanes):  # skip lane 0 (sidewalk)
-                    lid = f"{edge}_{idx}"
-                    total_q += traci.lane.getLastStepHaltingNumber(lid)
-                    total_w += traci.lane.getWaitingTime(lid)
-            except traci.exceptions.TraCIException:
-                pass
-            vehicle_lanes = max(n_lanes - 1, 1)  # exclude sidewalk
+            lane_ids = self._edge_lanes[edge]
+            for lid in lane_ids:
+                r = sub(lid)
+                total_q += r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+                total_w += r[tc.VAR_WAITING_TIME]
+            vehicle_lanes = max(len(lane_ids), 1)
             result[edge] = {
-                "queue": float(total_q),
-                "wait":  float(total_w / vehicle_lanes),
+                "queue": total_q,
+                "wait":  total_w / vehicle_lanes,
             }
         return result
 
     def _get_ped_counts(self, jid: str) -> np.ndarray:
-        cfg = JUNCTIONS[jid]
+        sub = traci.edge.getSubscriptionResults
         counts = np.zeros(4, dtype=np.float32)
-        for i, wa in enumerate(cfg.walking_areas):
-            try:
-                counts[i] = float(len(traci.edge.getLastStepPersonIDs(wa)))
-            except traci.exceptions.TraCIException:
-                pass
+        for i, wa in self._walk_idx[jid]:
+            counts[i] = len(sub(wa)[tc.LAST_STEP_PERSON_ID_LIST])
         return counts
 
     # ── Warm-start expert (per junction) ──────────────────────────────────────
@@ -930,12 +1049,10 @@ class CorridorEnv:
         return sets
 
     def _lane_halts(self, lanes: list) -> int:
+        sub = traci.lane.getSubscriptionResults
         total = 0
         for lane in lanes:
-            try:
-                total += traci.lane.getLastStepHaltingNumber(lane)
-            except traci.exceptions.TraCIException:
-                pass
+            total += sub(lane)[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
         return total
 
     def expert_action(self, jid: str) -> int:
@@ -21,11 +21,11 @@ Phase 2 → Phase 3 extension points are marked with # [EXTEND].
 
 import random
 import numpy as np
-from collections import deque
 from pathlib import Path
 
 import torch
 import torch.nn as nn
+import torch.nn.functional as F
 import torch.optim as optim
 
 
@@ -35,36 +35,52 @@ class DQNetwork(nn.Module):
     """
     Multi-layer perceptron Q-network: maps state → Q-value per action.
 
-    Architecture: input → [hidden layers with ReLU] → output
+    Architecture: input → fc1 → ReLU → fc2 → ReLU → fc3 → output
     Xavier initialisation for stable early training.
 
+    Written as an explicit functional forward (no nn.Sequential/nn.ReLU
+    modules) so torch.compile sees one straight-line graph and can fuse
+    each matmul + bias + relu epilogue.
+
     # [EXTEND] Replace with a dueling DQN architecture for Phase 3:
     #   separate value stream V(s) and advantage stream A(s,a)
     """
 
+    # Checkpoints saved before the fc1/fc2/fc3 layout used nn.Sequential
+    # indices (Linear layers at net.0 / net.2 / net.4).
+    _LEGACY_PREFIXES = {"net.0.": "fc1.", "net.2.": "fc2.", "net.4.": "fc3."}
+
     def __init__(self,
                  state_size:    int,
                  action_size:   int,
-                 hidden_sizes:  list[int] = (256, 256)):
+                 hidden_sizes:  tuple[int, int] = (256, 256)):
         super().__init__()
 
-        layers: list[nn.Module] = []
-        in_size = state_size
-        for h in hidden_sizes:
-            layers += [nn.Linear(in_size, h), nn.ReLU()]
-            in_size = h
-        layers.append(nn.Linear(in_size, action_size))
-
-        self.net = nn.Sequential(*layers)
+        h1, h2 = hidden_sizes
+        self.fc1 = nn.Linear(state_size, h1)
+        self.fc2 = nn.Linear(h1, h2)
+        self.fc3 = nn.Linear(h2, action_size)
 
         # Xavier init: ensures variance is consistent through the network
-        for m in self.modules():
-            if isinstance(m, nn.Linear):
-                nn.init.xavier_uniform_(m.weight)
-                nn.init.zeros_(m.bias)
+        for m in (self.fc1, self.fc2, self.fc3):
+            nn.init.xavier_uniform_(m.weight)
+            nn.init.zeros_(m.bias)
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        return self.net(x)
+        return self.fc3(F.relu(self.fc2(F.relu(self.fc1(x)))))
+
+    def load_state_dict(self, state_dict, strict: bool = True, assign: bool = False):
+        """Accept both the current and the legacy nn.Sequential key layout."""
+        remapped = {}
+        for k, v in state_dict.items():
+            for old, new in self._LEGACY_PREFIXES.items():
+                if k.startswith(old):
+                    k = new + k[len(old):]
+                    break
+            remapped[k] = v
+        # `assign` only exists from torch 2.1; forward it only when requested
+        kw = {"assign": True} if assign else {}
+        return super().load_state_dict(remapped, strict=strict, **kw)
 
 
 # ── Replay Buffer ─────────────────────────────────────────────────────────────
@@ -75,10 +91,56 @@ class ReplayBuffer:
 
     Random sampling breaks the temporal correlations in sequential
     experience, which is critical for stable DQN training.
+
+    Stored as a Structure-of-Arrays ring: one preallocated numpy array per
+    field, written at `head` and sampled with a single fancy-index gather
+    per field (no per-transition Python tuples on the learn() hot path).
+
+    With pin_memory=True (CUDA only) each mini-batch is gathered straight
+    into page-locked host tensors so learn() can issue non_blocking H2D
+    copies that DMA directly instead of staging through pageable memory.
+
+    With device=<cuda device> the arrays live on the GPU as torch tensors
+    instead: push() is one small H2D per field and sample() is a device-side
+    randint + index_select, so learn() does no host→device traffic at all.
+
+    num_agents=J > 1 stores one joint transition per slot for J junctions
+    sharing this buffer: states are (capacity, J, state_size) and actions /
+    rewards / dones are (capacity, J).  A sample is then (B, J, …), which
+    DQNAgent.learn() flattens to B·J rows for a single batched forward.
+
+    States are stored as float16 by default (inputs are normalised to ~[0, 1],
+    well inside half precision); that halves the two largest arrays and the
+    bytes moved per sample.  learn() upcasts to float32 on the device.
     """
 
-    def __init__(self, capacity: int = 100_000):
-        self.buffer: deque = deque(maxlen=capacity)
+    def __init__(self,
+                 capacity:   int  = 100_000,
+                 state_size: int  = 41,
+                 pin_memory: bool = False,
+                 device:     torch.device | None = None,
+                 num_agents: int  = 1,
+                 state_dtype: type = np.float16):
+        self.capacity    = capacity
+        self.pin_memory  = pin_memory
+        self.device      = device
+        self.num_agents  = num_agents
+        per = (capacity,) if num_agents == 1 else (capacity, num_agents)
+        if device is not None:
+            s_dtype = torch.from_numpy(np.empty(0, dtype=state_dtype)).dtype
+            self.states      = torch.empty(per + (state_size,), dtype=s_dtype,       device=device)
+            self.actions     = torch.empty(per,                 dtype=torch.int64,   device=device)
+            self.rewards     = torch.empty(per,                 dtype=torch.float32, device=device)
+            self.next_states = torch.empty(per + (state_size,), dtype=s_dtype,       device=device)
+            self.dones       = torch.empty(per,                 dtype=torch.float32, device=device)
+        else:
+            self.states      = np.empty(per + (state_size,), dtype=state_dtype)
+            self.actions     = np.empty(per,                 dtype=np.int64)
+            self.rewards     = np.empty(per,                 dtype=np.float32)
+            self.next_states = np.empty(per + (state_size,), dtype=state_dtype)
+            self.dones       = np.empty(per,                 dtype=np.float32)
+        self.head = 0   # next write slot
+        self.size = 0   # number of valid transitions
 
     def push(self,
              state:      np.ndarray,
@@ -86,28 +148,57 @@ class ReplayBuffer:
              reward:     float,
              next_state: np.ndarray,
              done:       bool) -> None:
-        self.buffer.append((
-            np.asarray(state,      dtype=np.float32),
-            int(action),
-            float(reward),
-            np.asarray(next_state, dtype=np.float32),
-            bool(done),
-        ))
+        i = self.head
+        if self.device is not None:
+            state      = torch.from_numpy(np.asarray(state,      dtype=np.float32))
+            next_state = torch.from_numpy(np.asarray(next_state, dtype=np.float32))
+            if self.num_agents > 1:
+                action = torch.from_numpy(np.asarray(action, dtype=np.int64))
+                reward = torch.from_numpy(np.asarray(reward, dtype=np.float32))
+                done   = torch.from_numpy(np.asarray(done,   dtype=np.float32))
+        self.states[i]      = state
+        self.actions[i]     = action
+        self.rewards[i]     = reward
+        self.next_states[i] = next_state
+        self.dones[i]       = done
+        self.head = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
 
     def sample(self, batch_size: int) -> tuple:
-        """Return a random mini-batch as five numpy arrays."""
-        batch = random.sample(self.buffer, batch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
+        """Return a random mini-batch as five arrays (tensors if pinned / on-device)."""
+        if self.device is not None:
+            idx = torch.randint(0, self.size, (batch_size,), device=self.device)
+            return tuple(arr.index_select(0, idx) for arr in (
+                self.states, self.actions, self.rewards,
+                self.next_states, self.dones,
+            ))
+        idx = np.random.randint(0, self.size, size=batch_size)
+        if self.pin_memory:
+            return tuple(self._gather_pinned(arr, idx) for arr in (
+                self.states, self.actions, self.rewards,
+                self.next_states, self.dones,
+            ))
         return (
-            np.array(states,      dtype=np.float32),
-            np.array(actions,     dtype=np.int64),
-            np.array(rewards,     dtype=np.float32),
-            np.array(next_states, dtype=np.float32),
-            np.array(dones,       dtype=np.float32),
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            self.dones[idx],
         )
 
     def __len__(self) -> int:
-        return len(self.buffer)
+        return self.size
+
+    @staticmethod
+    def _gather_pinned(arr: np.ndarray, idx: np.ndarray) -> torch.Tensor:
+        # torch's caching host allocator tracks in-flight async copies, so a
+        # fresh pinned block per batch is safe to reuse once the copy lands.
+        out = torch.empty((len(idx),) + arr.shape[1:],
+                          dtype=torch.from_numpy(arr[:0]).dtype,
+                          pin_memory=True)
+        np.take(arr, idx, axis=0, out=out.numpy())
+        return out
 
 
 # ── DQN Agent ─────────────────────────────────────────────────────────────────
@@ -119,9 +210,9 @@ class DQNAgent:
     Key design choices:
       • Double DQN: policy_net selects action, target_net evaluates it.
         Prevents overestimation of Q-values.
-      • Hard target update every TARGET_UPDATE_FREQ steps.
+      • Soft (Polyak) target update every step: θ' ← θ' + τ·(θ − θ').
       • Huber (SmoothL1) loss: less sensitive to outlier rewards than MSE.
-      • Gradient clipping at 10.0: prevents exploding gradients.
+      • Gradient clipping (global norm 1.0): prevents exploding gradients.
       • Apple Silicon MPS support: uses Metal GPU if available.
 
     Typical training loop:
@@ -146,20 +237,25 @@ class DQNAgent:
     LEARNING_RATE      = 5e-4      # Adam optimiser learning rate (lower for 5-action space)
     BATCH_SIZE         = 128       # Mini-batch size for each gradient update
     BUFFER_SIZE        = 100_000   # Replay buffer capacity
-    TARGET_UPDATE_FREQ = 200       # Hard target network sync interval (steps)
+    TAU                = 5e-3      # Polyak rate for the per-step soft target update
     MIN_BUFFER_SIZE    = 1_000     # Steps to collect before learning starts
+    GPU_BUFFER_BUDGET  = 512 << 20 # Max bytes of replay storage kept on a CUDA device
+    QUANT_CHECK_STATES = 256       # Random states an INT8 policy must agree on with fp32
     EPSILON_START      = 1.0       # Full exploration at episode 1
     EPSILON_MIN        = 0.01      # Minimal exploration (1% random — prevents cascading bad switches)
     EPSILON_DECAY      = 0.975     # Slow decay for thorough 5-action exploration
     #   After episode: 20 → ε≈0.60  |  60 → ε≈0.22  |  115 → ε≈0.05
 
     def __init__(self,
-                 state_size:  int = 42,
-                 action_size: int = 7,
-                 device:      str | None = None):
+                 state_size:    int = 42,
+                 action_size:   int = 7,
+                 device:        str | None = None,
+                 compile_model: bool | None = None,
+                 num_agents:    int = 1):
 
         self.state_size  = state_size
         self.action_size = action_size
+        self.num_agents  = num_agents   # junctions sharing this network / buffer
 
         # Device selection: prefer MPS (Apple Silicon) → CUDA → CPU
         if device:
@@ -170,20 +266,74 @@ class DQNAgent:
             self.device = torch.device("cuda")
         else:
             self.device = torch.device("cpu")
+        # Resolved once; every device-dependent switch below keys off these.
+        self._device_type = self.device.type
+        self._is_cuda     = self._device_type == "cuda"
 
         # Policy network: trained every step
         self.policy_net = DQNetwork(state_size, action_size).to(self.device)
 
-        # Target network: frozen copy updated every TARGET_UPDATE_FREQ steps
+        # Target network: slow-moving copy, Polyak-averaged towards policy_net
         self.target_net = DQNetwork(state_size, action_size).to(self.device)
         self.target_net.load_state_dict(self.policy_net.state_dict())
         self.target_net.eval()  # Never call .backward() on target_net
 
-        self.optimiser  = optim.Adam(self.policy_net.parameters(),
-                                     lr=self.LEARNING_RATE)
-        self.memory     = ReplayBuffer(self.BUFFER_SIZE)
+        # torch.compile fuses the Linear+ReLU chain; the tiny MLP is launch-
+        # bound, so fewer kernels matter more than FLOPs.  Auto-enabled on
+        # CUDA only — MPS support is patchy and on CPU the one-off compile
+        # cost outweighs the gain for short eval runs.  Module.compile()
+        # compiles in place, so state_dict keys (and checkpoints) are unchanged.
+        if compile_model is None:
+            compile_model = self._is_cuda
+        if compile_model and hasattr(nn.Module, "compile"):
+            self.policy_net.compile(fullgraph=True)
+            self.target_net.compile(fullgraph=True)
+
+        # bf16 autocast for the forwards in learn(): the MLP is weight-
+        # bandwidth bound, so half-width weights/activations ≈ half the bytes.
+        # bf16 keeps fp32's exponent range, so no GradScaler is needed; the
+        # loss and backward stay fp32.  CUDA with native bf16 only.
+        self.amp_enabled = (self._is_cuda
+                            and torch.cuda.is_bf16_supported())
+
+        # Multi-tensor Adam: one fused CUDA kernel (or foreach kernels on
+        # CPU/MPS) for all parameters instead of a per-tensor Python loop.
+        self._adam_impl = ({"fused": True} if self._is_cuda
+                           else {"foreach": True})
+        try:
+            self.optimiser = optim.Adam(self.policy_net.parameters(),
+                                        lr=self.LEARNING_RATE, **self._adam_impl)
+        except (TypeError, RuntimeError):   # torch without fused/foreach support
+            self._adam_impl = {}
+            self.optimiser = optim.Adam(self.policy_net.parameters(),
+                                        lr=self.LEARNING_RATE)
+
+        # CUDA: keep the whole replay buffer on the GPU when it fits the
+        # budget (≈18 MB at 100k × 41-dim fp16), else gather into pinned memory.
+        on_gpu = (self._is_cuda
+                  and self.BUFFER_SIZE * num_agents * (2 * state_size * 2 + 16)
+                      <= self.GPU_BUFFER_BUDGET)
+        self.memory     = ReplayBuffer(self.BUFFER_SIZE, state_size,
+                                       pin_memory=(self._is_cuda
+                                                   and not on_gpu),
+                                       device=self.device if on_gpu else None,
+                                       num_agents=num_agents)
+        self._buffer_on_device = on_gpu
         self.epsilon    = self.EPSILON_START
-        self.step_count = 0     # Global step counter (used for target net sync)
+        self.step_count = 0     # Global gradient-step counter
+
+        # Running loss kept on-device: a per-step .item() would force a full
+        # device sync every gradient update.  Read it back via flush_loss().
+        self._loss_accum = torch.zeros((), device=self.device)
+        self._loss_count = 0
+
+        # Reused (1, state_size) input for greedy_action(): one copy straight
+        # into device memory per decision, no per-call tensor allocation.
+        self._sa_state = torch.empty((1, state_size), device=self.device)
+
+        # Network used for action selection: policy_net itself, or an INT8
+        # copy of it after set_eval_mode(quantize=True)
+        self._infer_net = self.policy_net
 
         print(f"[DQN] Initialised on {self.device}")
         print(f"      Architecture: {state_size} -> 256 -> 256 -> {action_size}")
@@ -207,13 +357,38 @@ class DQNAgent:
 
         Exposed separately so callers can drive guided exploration (e.g. mixing
         in an expert/warm-start policy) while still using the network's greedy
-        action for the exploit branch.
+        action for the exploit branch.  Runs under inference_mode, which also
+        skips the autograd version/view tracking that no_grad still does.
         """
-        with torch.no_grad():
-            t = torch.FloatTensor(state).unsqueeze(0).to(self.device)
-            q = self.policy_net(t)
+        with torch.inference_mode():
+            self._sa_state[0].copy_(
+                torch.from_numpy(np.asarray(state, dtype=np.float32)))
+            q = self._infer_net(self._sa_state)
         return int(q.argmax(dim=1).item())
 
+    def greedy_actions(self, states: np.ndarray) -> np.ndarray:
+        """Batched greedy_action: argmax Q over N states in one forward pass."""
+        with torch.inference_mode():
+            t = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device)
+            return self._infer_net(t).argmax(1).cpu().numpy()
+
+    def select_actions(self, states: np.ndarray) -> np.ndarray:
+        """
+        Vectorised ε-greedy over a batch of N states → int64 array of N actions.
+
+        One forward pass and one torch.where replace N select_action() calls
+        (e.g. several junctions sharing this agent, or batched eval rollouts).
+        """
+        t = torch.from_numpy(np.asarray(states, dtype=np.float32)).to(self.device)
+        n = t.shape[0]
+        with torch.no_grad():
+            greedy = self._infer_net(t).argmax(1)
+            if self.epsilon <= 0.0:
+                return greedy.cpu().numpy()
+            rand    = torch.randint(0, self.action_size, (n,), device=self.device)
+            explore = torch.rand(n, device=self.device) < self.epsilon
+            return torch.where(explore, rand, greedy).cpu().numpy()
+
     # ── Learning ──────────────────────────────────────────────────────────────
 
     def remember(self,
@@ -222,10 +397,15 @@ class DQNAgent:
                  reward:     float,
                  next_state: np.ndarray,
                  done:       bool) -> None:
-        """Store one transition in the replay buffer."""
+        """
+        Store one transition in the replay buffer.
+
+        With num_agents=J > 1, pass (J, state_size) states and length-J
+        action / reward / done arrays — one row per junction.
+        """
         self.memory.push(state, action, reward, next_state, done)
 
-    def learn(self) -> float | None:
+    def learn(self) -> None:
         """
         Sample a mini-batch and perform one gradient update on policy_net.
 
@@ -234,8 +414,8 @@ class DQNAgent:
             target Q = r  +  γ · Q_target(s', a*)            (target evaluates)
                      = r                                      if done
 
-        Returns:
-            Scalar loss value, or None if buffer is not yet large enough.
+        No-op until the buffer holds MIN_BUFFER_SIZE transitions.  The loss
+        is accumulated on-device; call flush_loss() at log time to read it.
         """
         if len(self.memory) < self.MIN_BUFFER_SIZE:
             return None
@@ -243,45 +423,94 @@ class DQNAgent:
         states, actions, rewards, next_states, dones = \
             self.memory.sample(self.BATCH_SIZE)
 
-        states      = torch.FloatTensor(states).to(self.device)
-        actions     = torch.LongTensor(actions).to(self.device)
-        rewards     = torch.FloatTensor(rewards).to(self.device)
-        next_states = torch.FloatTensor(next_states).to(self.device)
-        dones       = torch.FloatTensor(dones).to(self.device)
+        if not self._buffer_on_device:
+            # as_tensor shares memory with the sampled numpy arrays (no extra
+            # host copy) and passes pinned tensors through untouched.
+            # non_blocking only overlaps when the source is pinned (CUDA); on
+            # CPU/MPS it degrades to the ordinary synchronous copy.
+            states      = torch.as_tensor(states).to(self.device, non_blocking=True)
+            actions     = torch.as_tensor(actions).to(self.device, non_blocking=True)
+            rewards     = torch.as_tensor(rewards).to(self.device, non_blocking=True)
+            next_states = torch.as_tensor(next_states).to(self.device, non_blocking=True)
+            dones       = torch.as_tensor(dones).to(self.device, non_blocking=True)
+        states      = states.float()
+        next_states = next_states.float()
+
+        if self.num_agents > 1:
+            # (B, J, …) → (B·J, …): every junction's transition is one row of
+            # the same batched forward through the shared network.
+            states      = states.reshape(-1, self.state_size)
+            next_states = next_states.reshape(-1, self.state_size)
+            actions     = actions.reshape(-1)
+            rewards     = rewards.reshape(-1)
+            dones       = dones.reshape(-1)
+
+        # One policy_net pass over [s; s'] serves both Q(s, a) and the
+        # Double-DQN argmax on s' — half the policy forwards per step.
+        batch  = states.shape[0]
+        with torch.autocast(self._device_type, dtype=torch.bfloat16,
+                            enabled=self.amp_enabled):
+            q_all  = self.policy_net(torch.cat((states, next_states), 0))
+            q_tnet = self.target_net(next_states)
+        q_all  = q_all.float()
 
         # Q(s, a) for the actions that were actually taken
-        q_curr = self.policy_net(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        q_curr = q_all[:batch].gather(1, actions.unsqueeze(1)).squeeze(1)
 
         # Double DQN: policy_net selects best action, target_net evaluates it.
         # This decouples selection from evaluation, reducing Q-value overestimation.
+        # (argmax carries no gradient, so the s' half never reaches backward.)
         with torch.no_grad():
-            best_actions = self.policy_net(next_states).argmax(1)
-            q_next       = self.target_net(next_states).gather(
+            best_actions = q_all[batch:].argmax(1)
+            q_next       = q_tnet.float().gather(
                                1, best_actions.unsqueeze(1)
                            ).squeeze(1)
             q_target     = rewards + self.GAMMA * q_next * (1.0 - dones)
 
         # Huber loss: quadratic for small errors, linear for large (robust)
-        loss = nn.SmoothL1Loss()(q_curr, q_target)
+        loss = F.smooth_l1_loss(q_curr, q_target)
 
-        self.optimiser.zero_grad()
+        self.optimiser.zero_grad(set_to_none=True)
         loss.backward()
-        nn.utils.clip_grad_norm_(self.policy_net.parameters(), max_norm=1.0)
+        nn.utils.clip_grad_norm_(self.policy_net.parameters(), max_norm=1.0,
+                                 foreach=True)
         self.optimiser.step()
 
         self.step_count += 1
-        if self.step_count % self.TARGET_UPDATE_FREQ == 0:
-            self._sync_target()
+        self._sync_target(self.TAU)
+
+        self._loss_accum += loss.detach()
+        self._loss_count += 1
+
+    def flush_loss(self) -> float | None:
+        """
+        Mean loss over the updates since the last flush, then reset.
 
-        return float(loss.item())
+        The only host↔device sync for loss reporting — call once per
+        episode / log interval.  Returns None if no update has run.
+        """
+        if self._loss_count == 0:
+            return None
+        mean = float((self._loss_accum / self._loss_count).item())
+        self._loss_accum.zero_()
+        self._loss_count = 0
+        return mean
 
     def decay_epsilon(self) -> None:
         """Apply one episode's worth of ε-decay. Call once per episode end."""
         self.epsilon = max(self.EPSILON_MIN, self.epsilon * self.EPSILON_DECAY)
 
-    def _sync_target(self) -> None:
-        """Hard copy: policy_net weights → target_net weights."""
-        self.target_net.load_state_dict(self.policy_net.state_dict())
+    def _sync_target(self, tau: float = 1.0) -> None:
+        """
+        In-place Polyak update: target ← target + τ·(policy − target).
+
+        One fused lerp_ per parameter tensor — no state_dict materialisation.
+        τ=1.0 is a hard copy (used after loading a checkpoint).
+        """
+        with torch.no_grad():
+            for tp, pp in zip(self.target_net.parameters(),
+                              self.policy_net.parameters()):
+                tp.lerp_(pp, tau)
 
     # ── Persistence ───────────────────────────────────────────────────────────
 
@@ -307,18 +536,49 @@ class DQNAgent:
         checkpoint = torch.load(path, map_location=self.device,
                                 weights_only=False)
         self.policy_net.load_state_dict(checkpoint["policy_net"])
+        self._infer_net = self.policy_net          # drop any stale INT8 copy
         self.target_net.load_state_dict(checkpoint["target_net"])
         self.optimiser.load_state_dict(checkpoint["optimiser"])
+        for group in self.optimiser.param_groups:   # checkpoint groups carry
+            group.update(self._adam_impl)           # the saving run's impl flags
         self.epsilon    = checkpoint.get("epsilon",    self.EPSILON_MIN)
         self.step_count = checkpoint.get("step_count", 0)
         self._sync_target()
         print(f"[DQN] Loaded: {path}  (ε={self.epsilon:.3f}, "
               f"steps={self.step_count:,})")
 
-    def set_eval_mode(self) -> None:
+    def set_eval_mode(self, quantize: bool = False) -> None:
         """
         Switch to pure exploitation mode for inference / evaluation.
         Sets ε=0 and disables dropout/batchnorm (no effect here but good practice).
+
+        quantize=True (CPU only, call after load()) selects actions with an
+        INT8 dynamically-quantized copy of policy_net — int8 Linear weights,
+        fp32 activations.  It is kept only if it picks the same greedy action
+        as the fp32 net on a fixed sample of states; otherwise fp32 is used.
+        policy_net itself (training, checkpoints) is never touched.
         """
         self.epsilon = 0.0
         self.policy_net.eval()
+        self._infer_net = self.policy_net
+        if not quantize:
+            return
+        if self._device_type != "cpu":
+            print(f"[DQN] INT8 inference is CPU-only — keeping fp32 on {self.device}")
+            return
+
+        qnet = torch.ao.quantization.quantize_dynamic(
+            self.policy_net, {nn.Linear}, dtype=torch.qint8)
+        gen    = torch.Generator().manual_seed(0)
+        golden = torch.rand((self.QUANT_CHECK_STATES, self.state_size), generator=gen)
+        with torch.inference_mode():
+            mismatch = int((self.policy_net(golden).argmax(1)
+                            != qnet(golden).argmax(1)).sum())
+        if mismatch:
+            print(f"[DQN] INT8 policy disagrees with fp32 on {mismatch}/"
+                  f"{self.QUANT_CHECK_STATES} check states — keeping fp32")
+            return
+        self._infer_net = qnet
+        print(f"[DQN] INT8 inference enabled "
+              f"(matches fp32 on {self.QUANT_CHECK_STATES} check states)")
+
@@ -43,6 +43,15 @@ import shutil
 import numpy as np
 from pathlib import Path
 
+# Numba is optional: without it the @njit kernels below run as plain Python.
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda fn: fn
+
 
 # ── SUMO / TraCI bootstrapping ────────────────────────────────────────────────
 
@@ -80,14 +89,29 @@ def _bootstrap_sumo() -> str:
 
 SUMO_HOME = _bootstrap_sumo()
 
-try:
-    import traci
-    import traci.exceptions
-except ImportError as e:
-    raise ImportError(
-        f"Cannot import traci: {e}\n"
-        f"Ensure SUMO_HOME/tools is in sys.path (SUMO_HOME={SUMO_HOME})"
-    ) from e
+# libsumo runs SUMO in-process behind the same API as traci, so every getter
+# is a C++ call instead of a TCP round-trip. It cannot drive sumo-gui, and it
+# supports only one simulation per process. Set ATCS_LIBSUMO=0 to force the
+# socket client (required for --gui). Scripts that issue their own TraCI
+# calls against this env's simulation should use this module's `traci`.
+USE_LIBSUMO = os.environ.get("ATCS_LIBSUMO", "1") == "1"
+if USE_LIBSUMO:
+    try:
+        import libsumo as traci
+    except ImportError:
+        USE_LIBSUMO = False
+
+if not USE_LIBSUMO:
+    try:
+        import traci
+        import traci.exceptions
+    except ImportError as e:
+        raise ImportError(
+            f"Cannot import traci: {e}\n"
+            f"Ensure SUMO_HOME/tools is in sys.path (SUMO_HOME={SUMO_HOME})"
+        ) from e
+
+tc = traci.constants
 
 
 # ── Constants ─────────────────────────────────────────────────────────────────
@@ -110,6 +134,14 @@ INCOMING_LANES = [
 CROSSING_EDGES = [":J0_c0", ":J0_c1", ":J0_c2", ":J0_c3"]
 WALKING_AREAS  = [":J0_w0", ":J0_w1", ":J0_w2", ":J0_w3"]
 
+# TraCI subscription variable sets (see TrafficEnv._subscribe_metrics)
+_LANE_VARS = (tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+              tc.LAST_STEP_MEAN_SPEED,
+              tc.VAR_WAITING_TIME)
+_WALK_VARS = (tc.LAST_STEP_PERSON_ID_LIST,)
+_SIM_VARS  = (tc.VAR_ARRIVED_VEHICLES_NUMBER,
+              tc.VAR_MIN_EXPECTED_VEHICLES)
+
 # Phase indices -- 8 phases for through + left-turn separation
 # Connection mapping (16 vehicle + 4 crossing = 20 link indices).
 # As of the lane-restricted rebuild, each approach has ONE through connection
@@ -167,6 +199,20 @@ PHASE_SIGNALS = {
 # Green phases (non-yellow)
 GREEN_PHASES = {NS_THROUGH, NS_LEFT, EW_THROUGH, EW_LEFT, NS_ALL, EW_ALL}
 
+# Yellow that clears each phase, indexed by phase number (switch hot path:
+# a tuple index instead of a membership-test branch). Yellow phases never
+# initiate a switch; their entries just mirror the old else-branch.
+_YELLOW_OF = (
+    NS_YELLOW,  # NS_THROUGH
+    NS_YELLOW,  # NS_LEFT
+    EW_YELLOW,  # NS_YELLOW
+    EW_YELLOW,  # EW_THROUGH
+    EW_YELLOW,  # EW_LEFT
+    EW_YELLOW,  # EW_YELLOW
+    NS_YELLOW,  # NS_ALL
+    EW_YELLOW,  # EW_ALL
+)
+
 # Which edges get green in each green phase
 PHASE_TO_EDGES = {
     NS_THROUGH: ["ACH_N2J", "ACH_S2J"],
@@ -240,11 +286,33 @@ MAX_WAIT       = 1200.0  # seconds (was 600 — heavy-traffic waits exceed 600 p
 MAX_PHASE_T    = 96.0    # one full 96-second TL cycle
 MAX_PED_QUEUE  = 15.0    # max pedestrians waiting at one walking area
 
+# Reciprocals so the per-decision normalisation is a multiply, not a divide
+_INV_MAX_QUEUE      = 1.0 / MAX_QUEUE
+_INV_MAX_QUEUE_LANE = 1.0 / MAX_QUEUE_LANE
+_INV_MAX_SPEED      = 1.0 / MAX_SPEED
+_INV_MAX_WAIT       = 1.0 / MAX_WAIT
+_INV_MAX_PHASE_T    = 1.0 / MAX_PHASE_T
+_INV_MAX_PED_QUEUE  = 1.0 / MAX_PED_QUEUE
+
 # ── Environment parameters ────────────────────────────────────────────────────
 DECISION_INTERVAL  = 5     # SUMO seconds between agent decisions
 MIN_GREEN_THROUGH  = 10    # seconds before through/all-phase switch (anti-flicker)
 MIN_GREEN_LEFT     = 8     # left-turn phases serve fewer vehicles — shorter hold
 YELLOW_DURATION    = 3     # seconds of yellow clearance
+
+# Minimum green per phase number, indexed like _YELLOW_OF (left arrows hold
+# shorter). Yellow entries mirror the old else-branch; _can_switch rejects
+# yellows before it looks here.
+_MIN_GREEN_OF = (
+    MIN_GREEN_THROUGH,  # NS_THROUGH
+    MIN_GREEN_LEFT,     # NS_LEFT
+    MIN_GREEN_THROUGH,  # NS_YELLOW
+    MIN_GREEN_THROUGH,  # EW_THROUGH
+    MIN_GREEN_LEFT,     # EW_LEFT
+    MIN_GREEN_THROUGH,  # EW_YELLOW
+    MIN_GREEN_THROUGH,  # NS_ALL
+    MIN_GREEN_THROUGH,  # EW_ALL
+)
 SIM_DURATION       = 7200  # seconds per episode (matches baseline)
 
 # Warm-start expert (guided exploration). The KEY lesson from the 2026-06-09
@@ -300,6 +368,84 @@ W_PED_WAIT    = 1.0    # pedestrian-wait penalty × min(n_ped / PED_REF, 2)
 FAIR_WAIT_THRESH = 30.0  # seconds — acceptable wait; penalty kicks in above this
 
 
+# ── Reward kernel ─────────────────────────────────────────────────────────────
+
+@njit(cache=True, fastmath=True, nogil=True)
+def _reward_kernel(total_queue: float, prev_total_queue: float,
+                   n_arrived: int, switched_too_soon: bool,
+                   q0: float, q1: float, q2: float, q3: float,
+                   worst_wait: float, has_waits: bool,
+                   n_ped_waiting: int) -> float:
+    """
+    Scalar body of TrafficEnv._compute_reward for the 4-approach junction.
+
+    Pure float arithmetic on module constants, so Numba compiles it to one
+    native call (cache=True keeps the compiled code across processes).
+    See _compute_reward for what each component means.
+    """
+    # Clamps are conditional expressions rather than max()/min() calls so the
+    # no-Numba fallback stays cheap in plain Python too.
+    delta   = total_queue - prev_total_queue
+    r_abs   = -W_QUEUE_ABS * (total_queue / QUEUE_REF)
+    r_delta = -W_QUEUE_DELTA * ((delta if delta > 0.0 else 0.0) / QUEUE_REF)
+    r_thru  = W_ARRIVED * n_arrived
+    r_flick = -W_FLICKER if switched_too_soon else 0.0
+
+    if total_queue > 0:
+        mean_q    = total_queue * 0.25
+        var_q     = ((q0 - mean_q) * (q0 - mean_q) + (q1 - mean_q) * (q1 - mean_q)
+                     + (q2 - mean_q) * (q2 - mean_q) + (q3 - mean_q) * (q3 - mean_q)) * 0.25
+        balance   = 1.0 - var_q ** 0.5 / (mean_q + 1.0)
+        r_balance = W_BALANCE * (balance if balance > 0.0 else 0.0)
+    else:
+        r_balance = W_BALANCE
+
+    r_max_wait = 0.0
+    if has_waits:
+        excess = (worst_wait - FAIR_WAIT_THRESH) / WAIT_REF
+        if excess > 0.0:
+            r_max_wait = -W_MAX_WAIT * (excess if excess < 3.0 else 3.0)
+
+    ped   = n_ped_waiting / PED_REF
+    r_ped = -W_PED_WAIT * (ped if ped < 2.0 else 2.0)
+
+    total = (r_abs + r_delta + r_thru
+             + r_flick + r_balance + r_max_wait + r_ped)
+    if total > REWARD_CLIP:
+        return REWARD_CLIP
+    return total if total > -REWARD_CLIP else -REWARD_CLIP
+
+
+# ── State kernel ──────────────────────────────────────────────────────────────
+
+@njit(cache=True, nogil=True)
+def _fill_state(out: np.ndarray, lane: np.ndarray, edge_q: np.ndarray,
+                phase: int, phase_timer: int, peds: np.ndarray) -> None:
+    """
+    Write the 41-dim state into `out` (layout in the module docstring).
+
+    `lane` is a (3, 8) float32 block of per-lane queue / speed / wait. Scaling
+    stays in float32 so the result matches the previous NumPy slice code.
+    """
+    inv_ql = np.float32(_INV_MAX_QUEUE_LANE)
+    inv_sp = np.float32(_INV_MAX_SPEED)
+    inv_w  = np.float32(_INV_MAX_WAIT)
+    for i in range(8):
+        out[i]      = lane[0, i] * inv_ql
+        out[8 + i]  = lane[1, i] * inv_sp
+        out[16 + i] = lane[2, i] * inv_w
+    inv_q = np.float32(_INV_MAX_QUEUE)
+    for i in range(4):
+        out[24 + i] = edge_q[i] * inv_q
+    for i in range(8):
+        out[28 + i] = 0.0
+    out[28 + phase] = 1.0
+    out[36] = min(phase_timer * _INV_MAX_PHASE_T, 1.0)
+    inv_p = np.float32(_INV_MAX_PED_QUEUE)
+    for i in range(4):
+        out[37 + i] = peds[i] * inv_p
+
+
 # ── Environment ───────────────────────────────────────────────────────────────
 
 class TrafficEnv:
@@ -323,6 +469,11 @@ class TrafficEnv:
     # a verifiable record of how SUMO ordered the controlled links).
     _layout_diagnostic_printed: bool = False
 
+    # Whether the network has a TL program at TL_ID.  Fixed by the network,
+    # so the getAllProgramLogics round-trip (a full program dump) is made on
+    # the first reset only, not once per episode.
+    _tl_present: bool | None = None
+
     def __init__(self, gui: bool = False, verbose: bool = False,
                  route_file: str | None = None):
         self.gui        = gui
@@ -338,12 +489,35 @@ class TrafficEnv:
         self._next_green       = NS_THROUGH
         self._sim_step         = 0        # cumulative simulation seconds
         self._prev_total_queue = 0.0      # for delta-queue reward component
-
-        # Per-episode stats (available after episode ends)
-        self.total_arrived: int   = 0
-        self.episode_rewards: list[float] = []
-        self.episode_queues:  list[float] = []
-        self.episode_waits:   list[float] = []
+        self._lane_ids: dict[str, list[str]] = {}   # edge → lane IDs (set per reset)
+        self._edge_lanes_flat: list[str]      = []   # all edge lanes, edge-major
+        self._edge_slices: dict[str, slice]   = {}   # edge → slice of the flat list
+        self._halt_buf = np.zeros(0, dtype=np.float64)
+        self._wait_buf = np.zeros(0, dtype=np.float64)
+        self._walk_idx: list[tuple[int, str]] = []   # subscribed walking areas
+
+        # Per-call scratch buffers, allocated once instead of per decision
+        self._queues_buf = np.zeros(len(INCOMING_EDGES), dtype=np.float64)
+        self._waits_buf  = np.zeros(len(INCOMING_EDGES), dtype=np.float64)
+        self._ped_buf    = np.zeros(len(WALKING_AREAS),  dtype=np.float32)
+        self._state_buf = np.zeros(STATE_SIZE, dtype=np.float32)
+        self._lane_buf  = np.zeros((3, len(INCOMING_LANES)), dtype=np.float32)
+        self._edge_q_buf = np.zeros(len(INCOMING_EDGES), dtype=np.float32)
+
+        # Per-episode stats (available after episode ends). One slot per
+        # decision block, preallocated; _ep_n counts the filled prefix.
+        ep_capacity = SIM_DURATION // DECISION_INTERVAL + 8
+        self.total_arrived: int = 0
+        self._ep_rewards = np.zeros(ep_capacity, dtype=np.float64)
+        self._ep_queues  = np.zeros(ep_capacity, dtype=np.float64)
+        self._ep_waits   = np.zeros(ep_capacity, dtype=np.float64)
+        self._ep_n: int  = 0
+
+        # Compile (or load from numba's on-disk cache) both kernels here, with
+        # the argument types step() uses, instead of inside the first step().
+        _reward_kernel(0.0, 0.0, 0, False, 0.0, 0.0, 0.0, 0.0, 0.0, False, 0)
+        _fill_state(self._state_buf, self._lane_buf, self._edge_q_buf,
+                    NS_THROUGH, 0, self._ped_buf)
 
     # ── Gym Interface ─────────────────────────────────────────────────────────
 
@@ -359,6 +533,7 @@ class TrafficEnv:
         self.close()
         self._start_sumo(seed=seed)
         self._configure_tl_for_ai_control()
+        self._subscribe_metrics()
 
         # Reset all bookkeeping
         self._phase            = NS_THROUGH
@@ -370,9 +545,7 @@ class TrafficEnv:
         self._prev_total_queue = 0.0
 
         self.total_arrived    = 0
-        self.episode_rewards  = []
-        self.episode_queues   = []
-        self.episode_waits    = []
+        self._ep_n            = 0
 
         # Advance one step to populate TraCI state
         traci.simulationStep()
@@ -408,41 +581,62 @@ class TrafficEnv:
                 self._initiate_switch(target_green=target)
 
         # ── Advance DECISION_INTERVAL simulation steps ────────────────────────
+        # Hot TraCI calls bound once per call (saves the module/attribute
+        # lookups inside the per-step loop). Arrivals and the vehicles-left
+        # count come from one simulation subscription read per step.
+        sim_step_fn = traci.simulationStep
+        sim_results = traci.simulation.getSubscriptionResults
+
         # Metrics accumulated over all steps in this block
         block_arrived   = 0
-        final_queues    = [0.0] * len(INCOMING_EDGES)
-        final_waits     = [0.0] * len(INCOMING_EDGES)
-
-        for _ in range(DECISION_INTERVAL):
-            # Handle yellow countdown: auto-complete switch
-            if self._in_yellow:
-                self._yellow_countdown -= 1
-                if self._yellow_countdown <= 0:
-                    self._complete_switch()
-
-            traci.simulationStep()
-            self._sim_step    += 1
-            self._phase_timer += 1
-
-            # Collect per-step arrivals
-            block_arrived += traci.simulation.getArrivedNumber()
-
-            # Check if simulation ran out of vehicles early
-            if traci.simulation.getMinExpectedNumber() == 0:
-                break
+        final_queues    = self._queues_buf    # reused per step — see info below
+        final_waits     = self._waits_buf
+
+        if not self._in_yellow:
+            # Fast path: no yellow to tick down, so the whole block is a single
+            # simulationStep(t) call inside SUMO. The arrived count then
+            # covers every vehicle that arrived during the jump.
+            sim_step_fn(self._sim_step + DECISION_INTERVAL)
+            self._sim_step    += DECISION_INTERVAL
+            self._phase_timer += DECISION_INTERVAL
+            r             = sim_results()
+            block_arrived = r[tc.VAR_ARRIVED_VEHICLES_NUMBER]
+            min_expected  = r[tc.VAR_MIN_EXPECTED_VEHICLES]
+        else:
+            for _ in range(DECISION_INTERVAL):
+                # Handle yellow countdown: auto-complete switch
+                if self._in_yellow:
+                    self._yellow_countdown -= 1
+                    if self._yellow_countdown <= 0:
+                        self._complete_switch()
+
+                sim_step_fn()
+                self._sim_step    += 1
+                self._phase_timer += 1
+
+                # Collect per-step arrivals
+                r = sim_results()
+                block_arrived += r[tc.VAR_ARRIVED_VEHICLES_NUMBER]
+
+                # Check if simulation ran out of vehicles early (the last value
+                # read is kept for the termination check — no simulationStep
+                # happens in between, so a second query would return the same)
+                min_expected = r[tc.VAR_MIN_EXPECTED_VEHICLES]
+                if min_expected == 0:
+                    break
 
         # Capture per-edge metrics from the end of the block
         edge_metrics = self._collect_edge_metrics()
         for i, edge in enumerate(INCOMING_EDGES):
-            final_queues[i] = edge_metrics[edge]["queue"]
-            final_waits[i]  = edge_metrics[edge]["wait"]
+            m = edge_metrics[edge]
+            final_queues[i] = m["queue"]
+            final_waits[i]  = m["wait"]
+        total_queue = float(final_queues.sum())
 
         # ── Reward ────────────────────────────────────────────────────────────
-        total_queue = float(sum(final_queues))
         self.total_arrived += block_arrived
 
-        min_g = (MIN_GREEN_LEFT if self._phase in (NS_LEFT, EW_LEFT)
-                 else MIN_GREEN_THROUGH)
+        min_g = _MIN_GREEN_OF[self._phase]
         # Count pedestrians waiting at junction walking areas
         ped_counts = self._get_pedestrian_counts()
         total_ped_waiting = int(sum(ped_counts))
@@ -460,18 +654,16 @@ class TrafficEnv:
         self._prev_total_queue = total_queue
 
         # Track episode stats
-        avg_wait = float(np.mean(final_waits)) if final_waits else 0.0
-        self.episode_rewards.append(reward)
-        self.episode_queues.append(total_queue)
-        self.episode_waits.append(avg_wait)
+        avg_wait = float(final_waits.sum()) / len(final_waits)
+        self._record_block(reward, total_queue, avg_wait)
 
         # ── Termination ───────────────────────────────────────────────────────
         done = (
             self._sim_step >= SIM_DURATION
-            or traci.simulation.getMinExpectedNumber() == 0
+            or min_expected == 0
         )
 
-        next_state = self._build_state()
+        next_state = self._build_state(edge_metrics, ped_counts)
 
         info = {
             "sim_step":      self._sim_step,
@@ -479,7 +671,7 @@ class TrafficEnv:
             "phase_timer":   self._phase_timer,
             "arrived_block": block_arrived,
             "total_arrived": self.total_arrived,
-            "queues":        final_queues,
+            "queues":        final_queues.tolist(),   # snapshot of the reused buffer
             "avg_wait":      avg_wait,
             "reward":        reward,
         }
@@ -497,53 +689,76 @@ class TrafficEnv:
 
     # ── Episode Summary Properties ────────────────────────────────────────────
 
+    def _record_block(self, reward: float, total_queue: float,
+                      avg_wait: float) -> None:
+        """Append one decision block's stats to the episode buffers."""
+        n = self._ep_n
+        self._ep_rewards[n] = reward
+        self._ep_queues[n]  = total_queue
+        self._ep_waits[n]   = avg_wait
+        self._ep_n = n + 1
+
+    @property
+    def episode_rewards(self) -> np.ndarray:
+        return self._ep_rewards[:self._ep_n]
+
+    @property
+    def episode_queues(self) -> np.ndarray:
+        return self._ep_queues[:self._ep_n]
+
+    @property
+    def episode_waits(self) -> np.ndarray:
+        return self._ep_waits[:self._ep_n]
+
     @property
     def episode_avg_wait(self) -> float:
-        return float(np.mean(self.episode_waits)) if self.episode_waits else 0.0
+        if self._ep_n == 0:
+            return 0.0
+        return float(self.episode_waits.mean())
 
     @property
     def episode_peak_queue(self) -> int:
-        return int(max(self.episode_queues)) if self.episode_queues else 0
+        return int(self.episode_queues.max()) if self._ep_n else 0
 
     @property
     def episode_total_reward(self) -> float:
-        return float(sum(self.episode_rewards))
+        return float(self.episode_rewards.sum())
 
     # ── State Construction ────────────────────────────────────────────────────
 
-    def _build_state(self) -> np.ndarray:
-        """Construct the 42-dimensional normalised state vector."""
-        lane_m = self._collect_lane_metrics()
-        edge_m = self._collect_edge_metrics()
-
-        # Per-lane features (7 lanes x 3 = 21 dims)
-        lane_queues = np.array([lane_m[l]["queue"] for l in INCOMING_LANES], dtype=np.float32)
-        lane_speeds = np.array([lane_m[l]["speed"] for l in INCOMING_LANES], dtype=np.float32)
-        lane_waits  = np.array([lane_m[l]["wait"]  for l in INCOMING_LANES], dtype=np.float32)
-
-        # Per-approach aggregate queues (4 dims)
-        approach_queues = np.array([edge_m[e]["queue"] for e in INCOMING_EDGES], dtype=np.float32)
-
-        # One-hot encode the current phase (8 dims)
-        phase_vec = np.zeros(NUM_PHASES, dtype=np.float32)
-        phase_vec[self._phase] = 1.0
+    def _build_state(self,
+                     edge_m:     dict[str, dict] | None = None,
+                     ped_counts: np.ndarray | None = None) -> np.ndarray:
+        """
+        Construct the 41-dimensional normalised state vector.
 
-        # Normalised time in current phase
-        t_norm = np.float32(min(self._phase_timer / MAX_PHASE_T, 1.0))
+        step() passes in the edge metrics / pedestrian counts it already read
+        for the reward (same sim time), so they are not fetched twice.
+        """
+        if edge_m is None:
+            edge_m = self._collect_edge_metrics()
+        if ped_counts is None:
+            ped_counts = self._get_pedestrian_counts()
+
+        # Per-lane queue / speed / wait straight from the subscriptions into
+        # the (3, 8) SoA block (no per-lane dicts)
+        res  = traci.lane.getAllSubscriptionResults()
+        lane = self._lane_buf
+        for i, lane_id in enumerate(INCOMING_LANES):
+            r = res[lane_id]
+            lane[0, i] = r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            lane[1, i] = max(0.0, r[tc.LAST_STEP_MEAN_SPEED])
+            lane[2, i] = r[tc.VAR_WAITING_TIME]
+
+        edge_q = self._edge_q_buf
+        for i, edge in enumerate(INCOMING_EDGES):
+            edge_q[i] = edge_m[edge]["queue"]
 
-        # Pedestrian waiting counts per walking area (4 dims)
-        ped_counts = self._get_pedestrian_counts()
+        buf = self._state_buf
+        _fill_state(buf, lane, edge_q, self._phase, self._phase_timer, ped_counts)
 
-        state = np.concatenate([
-            lane_queues / MAX_QUEUE_LANE,   # 8 per-lane queues
-            lane_speeds / MAX_SPEED,         # 8 per-lane speeds
-            lane_waits  / MAX_WAIT,          # 8 per-lane waits
-            approach_queues / MAX_QUEUE,     # 4 approach queue totals
-            phase_vec,                       # 8 phase one-hot
-            [t_norm],                        # 1 phase timer
-            ped_counts / MAX_PED_QUEUE,      # 4 pedestrian waits
-        ])                                   # = 41 total (emergency dims removed)
-        return state.astype(np.float32)
+        # Copy out: callers keep (state, next_state) pairs for replay.
+        return buf.copy()
 
     # ── Reward Computation ────────────────────────────────────────────────────
 
@@ -569,60 +784,46 @@ class TrafficEnv:
         """
         # All penalties are NORMALISED to a reference scale so heavy traffic
         # produces a finite, discriminative gradient (see weight-block note).
-
-        # 1. Congestion penalty — normalised by QUEUE_REF (was absolute → diverged)
-        r_abs   = -W_QUEUE_ABS * (total_queue / QUEUE_REF)
-
-        # 2. Delta: penalise net queue GROWTH only (no reward for shrinkage —
-        #    rewarding shrinkage let the agent oscillate phases to farm reward
-        #    without improving net throughput).
-        delta   = total_queue - prev_total_queue
-        r_delta = -W_QUEUE_DELTA * (max(0.0, delta) / QUEUE_REF)
-
-        # 3. Throughput (accumulated over the DECISION_INTERVAL steps)
-        r_thru  = W_ARRIVED * n_arrived
-
-        # 4. Flicker penalty
-        r_flick = -W_FLICKER if switched_too_soon else 0.0
-
-        # 6. Balance: lower variance in queue distribution = higher bonus
-        if total_queue > 0:
-            mean_q    = total_queue / max(len(queue_distribution), 1)
-            std_q     = float(np.std(queue_distribution))
-            balance   = max(0.0, 1.0 - std_q / (mean_q + 1.0))
-            r_balance = W_BALANCE * balance
-        else:
-            r_balance = W_BALANCE  # zero traffic = maximum balance
-
-        # 7. Max-wait penalty: prevent any single approach from being starved.
-        #    Normalised by WAIT_REF and CAPPED so one gridlocked approach cannot
-        #    dominate the whole reward (the old unbounded form did exactly that).
-        r_max_wait = 0.0
-        if wait_distribution:
-            worst_wait = max(wait_distribution)
-            excess     = max(0.0, worst_wait - FAIR_WAIT_THRESH)
-            r_max_wait = -W_MAX_WAIT * min(excess / WAIT_REF, 3.0)
-
-        # 8. Pedestrian waiting penalty — normalised + capped
-        r_ped = -W_PED_WAIT * min(n_ped_waiting / PED_REF, 2.0)
-
-        total = (r_abs + r_delta + r_thru
-                 + r_flick + r_balance + r_max_wait + r_ped)
-
-        # Clip so cross-scenario Q-targets stay well-conditioned and no single
-        # block can blow up the return: bounds per-block reward to ±REWARD_CLIP.
-        return float(max(-REWARD_CLIP, min(REWARD_CLIP, total)))
+        #   1. Congestion  -W_QUEUE_ABS   · total_queue / QUEUE_REF
+        #   2. Delta       -W_QUEUE_DELTA · max(0, growth) / QUEUE_REF — growth
+        #      only: rewarding shrinkage let the agent oscillate phases to
+        #      farm reward without improving net throughput
+        #   3. Throughput  +W_ARRIVED · n_arrived (over DECISION_INTERVAL steps)
+        #   4. Flicker     -W_FLICKER if switched before min-green
+        #   6. Balance     +W_BALANCE · max(0, 1 - std_q / (mean_q + 1));
+        #      zero traffic = maximum balance
+        #   7. Max-wait    -W_MAX_WAIT · min(excess / WAIT_REF, 3) — capped so
+        #      one gridlocked approach cannot dominate (the old unbounded form did)
+        #   8. Pedestrian  -W_PED_WAIT · min(n_ped / PED_REF, 2)
+        # The sum is clipped to ±REWARD_CLIP so cross-scenario Q-targets stay
+        # well-conditioned and no single block can blow up the return.
+        has_waits = wait_distribution is not None and len(wait_distribution) > 0
+
+        # Empty junction (common early/late in an episode): every term but the
+        # balance bonus is zero — growth is max(0, 0 - prev) regardless of prev.
+        if (total_queue == 0 and n_arrived == 0 and n_ped_waiting == 0
+                and not switched_too_soon
+                and (not has_waits or max(wait_distribution) <= FAIR_WAIT_THRESH)):
+            return W_BALANCE
+
+        q0, q1, q2, q3 = queue_distribution
+        return float(_reward_kernel(
+            float(total_queue), float(prev_total_queue),
+            int(n_arrived), bool(switched_too_soon),
+            float(q0), float(q1), float(q2), float(q3),
+            float(max(wait_distribution)) if has_waits else 0.0,
+            has_waits,
+            int(n_ped_waiting),
+        ))
 
     # ── Expert / warm-start policy ────────────────────────────────────────────
 
     def _lane_halts(self, lanes: tuple) -> int:
-        """Sum of halted vehicles on the given lanes (0 on any TraCI hiccup)."""
+        """Sum of halted vehicles on the given lanes."""
+        sub = traci.lane.getSubscriptionResults
         total = 0
         for lane in lanes:
-            try:
-                total += traci.lane.getLastStepHaltingNumber(lane)
-            except traci.TraCIException:
-                pass
+            total += sub(lane)[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
         return total
 
     def expert_action(self) -> int:
@@ -686,9 +887,7 @@ class TrafficEnv:
         """True if the current green phase has run long enough to switch."""
         if self._in_yellow or self._phase not in GREEN_PHASES:
             return False
-        if self._phase in (NS_LEFT, EW_LEFT):
-            return self._phase_timer >= MIN_GREEN_LEFT
-        return self._phase_timer >= MIN_GREEN_THROUGH
+        return self._phase_timer >= _MIN_GREEN_OF[self._phase]
 
     def _initiate_switch(self, target_green: int | None = None) -> None:
         """
@@ -701,10 +900,7 @@ class TrafficEnv:
             return
 
         # Determine the yellow phase that clears the current green
-        if self._phase in (NS_THROUGH, NS_LEFT, NS_ALL):
-            yellow = NS_YELLOW
-        else:
-            yellow = EW_YELLOW
+        yellow = _YELLOW_OF[self._phase]
 
         self._next_green = target_green
         traci.trafficlight.setRedYellowGreenState(TL_ID, PHASE_SIGNALS[yellow])
@@ -730,6 +926,11 @@ class TrafficEnv:
 
     def _start_sumo(self, seed: int | None = None) -> None:
         """Launch SUMO and establish TraCI connection."""
+        if self.gui and USE_LIBSUMO:
+            raise RuntimeError(
+                "sumo-gui needs the TraCI socket backend — "
+                "set ATCS_LIBSUMO=0 to run with gui=True"
+            )
         binary = "sumo-gui" if self.gui else "sumo"
 
         # Locate binary: SUMO_HOME/bin first, then PATH
@@ -756,29 +957,32 @@ class TrafficEnv:
 
     def _configure_tl_for_ai_control(self) -> None:
         """
-        Install an 'ai_control' TL program with long-duration phases,
-        then immediately set NS_THROUGH via setRedYellowGreenState().
+        Install an 'ai_control' TL program with long-duration phases whose
+        phase i is PHASE_SIGNALS[i], starting on NS_THROUGH.
 
         The long-duration program prevents SUMO from auto-advancing.
         All actual signal changes go through setRedYellowGreenState()
         with our custom 20-character PHASE_SIGNALS strings
         (16 vehicle links + 4 pedestrian crossings).
         """
-        logics = traci.trafficlight.getAllProgramLogics(TL_ID)
-        if not logics:
+        if TrafficEnv._tl_present is None:
+            TrafficEnv._tl_present = bool(traci.trafficlight.getAllProgramLogics(TL_ID))
+        if not TrafficEnv._tl_present:
             if self.verbose:
                 print(f"[ENV] WARNING: No TL logic found for '{TL_ID}'")
             return
 
-        orig = logics[0]
+        # Built from PHASE_SIGNALS (indexed by phase number) rather than the
+        # netconvert program, so the installed program already shows
+        # NS_THROUGH and reset() needs no extra setRedYellowGreenState().
         long_phases = [
-            traci.trafficlight.Phase(1_000_000, p.state)
-            for p in orig.phases
+            traci.trafficlight.Phase(1_000_000, PHASE_SIGNALS[ph])
+            for ph in range(NUM_PHASES)
         ]
         ai_logic = traci.trafficlight.Logic(
             programID         = "ai_control",
             type              = 0,        # static
-            currentPhaseIndex = 0,
+            currentPhaseIndex = NS_THROUGH,
             phases            = long_phases,
             subParameter      = {},
         )
@@ -806,8 +1010,6 @@ class TrafficEnv:
             except traci.exceptions.TraCIException as exc:
                 print(f"[ENV] WARNING: Could not fetch link layout: {exc}")
 
-        # Set initial phase using direct signal state string
-        traci.trafficlight.setRedYellowGreenState(TL_ID, PHASE_SIGNALS[NS_THROUGH])
         self._phase = NS_THROUGH
 
         if self.verbose:
@@ -818,20 +1020,73 @@ class TrafficEnv:
 
     # ── Metric Collection ─────────────────────────────────────────────────────
 
+    def _subscribe_metrics(self) -> None:
+        """
+        Register TraCI variable subscriptions for every metric the env reads.
+
+        SUMO pushes the subscribed values back with each simulationStep, so
+        the collectors below are dict lookups instead of one getter round-trip
+        per lane / walking area per call.  Subscriptions die with the SUMO
+        process, so this runs once per reset().
+
+        Also the one place the network is validated: a missing incoming edge
+        or lane raises here with a clear message, so the per-step collectors
+        carry no try/except and read subscription results unguarded.
+        """
+        # Lane counts / IDs are static for the episode — resolve them once
+        # here rather than per _collect_edge_metrics() call.
+        self._lane_ids = {}
+        try:
+            for edge in INCOMING_EDGES:
+                n_lanes = traci.edge.getLaneNumber(edge)
+                self._lane_ids[edge] = [f"{edge}_{idx}" for idx in range(n_lanes)]
+            lanes = set(INCOMING_LANES)
+            for lane_list in self._lane_ids.values():
+                lanes.update(lane_list)
+            for lane_id in sorted(lanes):
+                traci.lane.subscribe(lane_id, _LANE_VARS)
+        except traci.exceptions.TraCIException as exc:
+            raise RuntimeError(
+                f"Network does not match TrafficEnv's incoming edges/lanes "
+                f"({exc}) — rebuild with scripts/build_network.py"
+            ) from exc
+
+        # Flattened SoA view of the same lanes: _collect_edge_metrics fills
+        # one halting / waiting buffer in a single pass and reduces each
+        # edge's contiguous slice.
+        self._edge_lanes_flat = [l for e in INCOMING_EDGES for l in self._lane_ids[e]]
+        self._edge_slices     = {}
+        off = 0
+        for edge in INCOMING_EDGES:
+            n = len(self._lane_ids[edge])
+            self._edge_slices[edge] = slice(off, off + n)
+            off += n
+        self._halt_buf = np.zeros(off, dtype=np.float64)
+        self._wait_buf = np.zeros(off, dtype=np.float64)
+
+        # Simulation-wide counters read once per step by step()
+        traci.simulation.subscribe(_SIM_VARS)
+
+        # Walking areas only exist on networks built with crossings; a
+        # network without them just reports zero pedestrians.
+        self._walk_idx = []
+        for i, wa in enumerate(WALKING_AREAS):
+            try:
+                traci.edge.subscribe(wa, _WALK_VARS)
+                self._walk_idx.append((i, wa))
+            except traci.exceptions.TraCIException:
+                pass
+
     def _collect_lane_metrics(self) -> dict[str, dict]:
-        """Fetch per-lane queue, speed, and wait time from TraCI."""
+        """Read per-lane queue, speed, and wait time from the subscriptions."""
+        res = traci.lane.getAllSubscriptionResults()
         result: dict[str, dict] = {}
         for lane_id in INCOMING_LANES:
-            try:
-                q = traci.lane.getLastStepHaltingNumber(lane_id)
-                s = traci.lane.getLastStepMeanSpeed(lane_id)
-                w = traci.lane.getWaitingTime(lane_id)
-            except traci.exceptions.TraCIException:
-                q, s, w = 0, 0.0, 0.0
+            r = res[lane_id]
             result[lane_id] = {
-                "queue": float(q),
-                "speed": max(0.0, float(s)),
-                "wait":  float(w),
+                "queue": r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER],
+                "speed": max(0.0, r[tc.LAST_STEP_MEAN_SPEED]),
+                "wait":  r[tc.VAR_WAITING_TIME],
             }
         return result
 
@@ -840,32 +1095,211 @@ class TrafficEnv:
         Fetch per-edge queue length and average wait time from TraCI.
         Sums over all lanes on each incoming edge.
         """
+        # One bulk read of every subscribed lane instead of a call per lane
+        res   = traci.lane.getAllSubscriptionResults()
+        halts = self._halt_buf
+        waits = self._wait_buf
+        for i, lid in enumerate(self._edge_lanes_flat):
+            r = res[lid]
+            halts[i] = r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+            waits[i] = r[tc.VAR_WAITING_TIME]
+
         result: dict[str, dict] = {}
         for edge in INCOMING_EDGES:
-            total_q = 0
-            total_w = 0.0
-            n_lanes = 0
-            try:
-                n_lanes = traci.edge.getLaneNumber(edge)
-                for idx in range(n_lanes):
-                    lid = f"{edge}_{idx}"
-                    total_q += traci.lane.getLastStepHaltingNumber(lid)
-                    total_w += traci.lane.getWaitingTime(lid)
-            except traci.exceptions.TraCIException:
-                pass
+            sl = self._edge_slices[edge]
             result[edge] = {
-                "queue": float(total_q),
-                "wait":  float(total_w / max(n_lanes, 1)),
+                "queue": float(halts[sl].sum()),
+                "wait":  float(waits[sl].sum() / max(sl.stop - sl.start, 1)),
             }
         return result
 
     def _get_pedestrian_counts(self) -> np.ndarray:
         """Return pedestrian count at each of the 4 junction walking areas."""
-        counts = np.zeros(len(WALKING_AREAS), dtype=np.float32)
-        for i, wa in enumerate(WALKING_AREAS):
-            try:
-                counts[i] = float(len(traci.edge.getLastStepPersonIDs(wa)))
-            except traci.exceptions.TraCIException:
-                pass
+        res = traci.edge.getAllSubscriptionResults()
+        counts = self._ped_buf      # reused; callers consume it before the next call
+        counts.fill(0.0)
+        for i, wa in self._walk_idx:
+            counts[i] = len(res[wa][tc.LAST_STEP_PERSON_ID_LIST])
         return counts
 
+
+
+# ── Parallel environments ─────────────────────────────────────────────────────
+
+def _parallel_worker(conn, shm_name: str, index: int,
+                     route_file: str | None, verbose: bool) -> None:
+    """
+    Worker-process loop for ParallelTrafficEnv: owns one TrafficEnv (and so one
+    private SUMO / libsumo instance) and writes states straight into row
+    `index` of the shared state block. Only small scalars go over the pipe.
+    """
+    from multiprocessing import shared_memory
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    row = np.ndarray((STATE_SIZE,), dtype=np.float32, buffer=shm.buf,
+                     offset=index * STATE_SIZE * np.dtype(np.float32).itemsize)
+    env    = TrafficEnv(verbose=verbose, route_file=route_file)
+    try:
+        while True:
+            cmd, arg = conn.recv()
+            if cmd == "step":
+                state, reward, done, info = env.step(arg)
+                row[:] = state
+                if done:
+                    info["episode_avg_wait"]     = env.episode_avg_wait
+                    info["episode_peak_queue"]   = env.episode_peak_queue
+                    info["episode_total_reward"] = env.episode_total_reward
+                conn.send((reward, done, info))
+            elif cmd == "reset":
+                seed, route = arg
+                if route is not None:
+                    env.route_file = route
+                row[:] = env.reset(seed=seed)
+                conn.send(None)
+            elif cmd == "expert":
+                conn.send(env.expert_action())
+            elif cmd == "close":
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        env.close()
+        del row
+        shm.close()
+        conn.close()
+
+
+class ParallelTrafficEnv:
+    """
+    K independent TrafficEnvs, each in its own worker process with its own SUMO.
+
+    SUMO is single-threaded, so one env leaves the other cores idle; episodes
+    are independent, so K workers give ~K× simulation throughput (up to the
+    core count). The trainer batches the exploiting workers' states into one
+    forward pass (DQNAgent.greedy_actions) and hands back a vector of actions;
+    plain ε-greedy callers can use DQNAgent.select_actions as below.
+
+    States come back through a shared-memory (K, STATE_SIZE) float32 block —
+    no pickling of arrays; only reward / done / info cross the pipes.
+    Workers do NOT auto-reset: after a done, call reset_one(i, ...) so the
+    terminal next_state can still be stored in replay.
+
+    Usage:
+        venv   = ParallelTrafficEnv(4, route_file=...)
+        states = venv.reset(seeds=[1, 2, 3, 4])
+        while ...:
+            actions = agent.select_actions(states)
+            next_states, rewards, dones, infos = venv.step(actions)
+            ...
+        venv.close()
+    """
+
+    def __init__(self, n_envs: int, route_file: str | None = None,
+                 verbose: bool = False):
+        import multiprocessing as mp
+        from multiprocessing import shared_memory
+
+        if n_envs < 1:
+            raise ValueError(f"n_envs must be >= 1 (got {n_envs})")
+        self.n_envs  = n_envs
+        self._shm    = shared_memory.SharedMemory(
+            create=True, size=n_envs * STATE_SIZE * np.dtype(np.float32).itemsize)
+        self._states = np.ndarray((n_envs, STATE_SIZE), dtype=np.float32,
+                                  buffer=self._shm.buf)
+        self._states.fill(0.0)
+        self._rewards = np.zeros(n_envs, dtype=np.float32)
+        self._dones   = np.zeros(n_envs, dtype=bool)
+
+        self._conns: list = []
+        self._procs: list = []
+        for i in range(n_envs):
+            parent, child = mp.Pipe()
+            p = mp.Process(target=_parallel_worker,
+                           args=(child, self._shm.name, i, route_file, verbose),
+                           name=f"traffic-env-{i}", daemon=True)
+            p.start()
+            child.close()
+            self._conns.append(parent)
+            self._procs.append(p)
+        self._closed = False
+
+    def reset(self, seeds: list[int | None] | None = None,
+              route_files: list[str | None] | None = None) -> np.ndarray:
+        """Reset every worker (in parallel) and return a copy of the (K, STATE_SIZE) states."""
+        seeds       = seeds       or [None] * self.n_envs
+        route_files = route_files or [None] * self.n_envs
+        for conn, seed, route in zip(self._conns, seeds, route_files):
+            conn.send(("reset", (seed, route)))
+        for conn in self._conns:
+            conn.recv()
+        return self._states.copy()
+
+    def reset_one(self, i: int, seed: int | None = None,
+                  route_file: str | None = None) -> np.ndarray:
+        """Reset worker i only and return its new state."""
+        self._conns[i].send(("reset", (seed, route_file)))
+        self._conns[i].recv()
+        return self._states[i].copy()
+
+    def step(self, actions,
+             active: list[bool] | None = None) -> tuple[np.ndarray, np.ndarray, np.ndarray, list[dict]]:
+        """
+        Step all K envs concurrently.
+
+        Returns (next_states[K, STATE_SIZE], rewards[K], dones[K], infos).
+        Done envs also carry episode_avg_wait / _peak_queue / _total_reward
+        in their info dict.
+
+        With an `active` mask only those workers are stepped (e.g. ones whose
+        episode has ended and that have nothing left to run); the others keep
+        their state and report reward 0, done False and an empty info.
+        """
+        idx = [i for i in range(self.n_envs) if active is None or active[i]]
+        for i in idx:
+            self._conns[i].send(("step", int(actions[i])))
+        infos: list[dict] = [{} for _ in range(self.n_envs)]
+        self._rewards.fill(0.0)
+        self._dones.fill(False)
+        for i in idx:
+            reward, done, info = self._conns[i].recv()
+            self._rewards[i] = reward
+            self._dones[i]   = done
+            infos[i] = info
+        return self._states.copy(), self._rewards.copy(), self._dones.copy(), infos
+
+    def expert_actions(self) -> list[int]:
+        """env.expert_action() from every worker (for warm-start exploration)."""
+        for conn in self._conns:
+            conn.send(("expert", None))
+        return [conn.recv() for conn in self._conns]
+
+    def expert_action(self, i: int) -> int:
+        """env.expert_action() from worker i only."""
+        self._conns[i].send(("expert", None))
+        return self._conns[i].recv()
+
+    def close(self) -> None:
+        """Stop the workers (closing their SUMO instances) and free shared memory."""
+        if self._closed:
+            return
+        self._closed = True
+        for conn in self._conns:
+            try:
+                conn.send(("close", None))
+            except (BrokenPipeError, OSError):
+                pass
+        for p in self._procs:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        for conn in self._conns:
+            conn.close()
+        del self._states
+        self._shm.close()
+        self._shm.unlink()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -32,12 +32,10 @@ for name in SCENARIOS:
     route = str(ROOT / "simulation" / "scenarios" / f"{name}.rou.xml")
     print(f"\n{'#'*70}\n#  BASELINE: {name}\n{'#'*70}", flush=True)
     try:
-        records = rb.run_simulation(gui=False, preset="protected", route_file=route)
-        aw   = [r["avg_wait_time_s"] for r in records]
-        q    = [r["total_queue_vehicles"] for r in records]
-        comp = records[-1]["completed_vehicles"]
-        mean_aw = sum(aw) / len(aw)
-        peak_q  = max(q)
+        stats   = rb.run_simulation(gui=False, preset="protected", route_file=route)
+        mean_aw = stats["overall_avg_wait"]
+        peak_q  = stats["peak_queue"]
+        comp    = stats["total_completed"]
         # "saturated" = fixed timer can't hold it (runaway queue / huge wait)
         saturated = mean_aw > 400 or peak_q > 400
         rows.append({"scenario": name, "baseline_avg_wait_s": round(mean_aw, 1),
@@ -9,6 +9,7 @@ using SUMO's `netconvert` tool.
 Supports two modes:
   python scripts/build_network.py               # Single junction (intersection.net.xml)
   python scripts/build_network.py --corridor     # 3-junction corridor (corridor.net.xml)
+  python scripts/build_network.py --verbose      # stream netconvert progress live
 
 What it does:
   1. Verifies SUMO is installed and SUMO_HOME is set
@@ -17,10 +18,14 @@ What it does:
 """
 
 import os
+import re
 import sys
+import mmap
 import subprocess
 import shutil
 import argparse
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -39,10 +44,19 @@ CORR_EDGES_FILE  = SIM_DIR / "corridor_edges.edg.xml"
 CORR_OUTPUT_NET  = SIM_DIR / "corridor.net.xml"
 
 
+# Element tags counted in the built network's sanity summary
+_NET_ELEMENT_RE = re.compile(rb"<(junction|edge|tlLogic) ")
+
+
 # ── SUMO Detection ────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=None)
 def find_sumo_home() -> str | None:
-    """Return the SUMO installation directory, or None if not found."""
+    """Return the SUMO installation directory, or None if not found.
+
+    Cached (as is find_binary): install paths don't change mid-process and
+    --all builds both networks in one run.
+    """
     # Respect existing environment variable
     if "SUMO_HOME" in os.environ and os.path.isdir(os.environ["SUMO_HOME"]):
         return os.environ["SUMO_HOME"]
@@ -72,6 +86,7 @@ def find_sumo_home() -> str | None:
     return None
 
 
+@lru_cache(maxsize=None)
 def find_binary(name: str) -> str | None:
     """Locate a binary in PATH or known SUMO bin directories."""
     found = shutil.which(name)
@@ -121,7 +136,7 @@ def print_install_instructions():
 # ── Build Functions ──────────────────────────────────────────────────────────
 
 def _run_netconvert(netconvert: str, nodes: Path, edges: Path, output: Path,
-                    label: str) -> None:
+                    label: str, verbose: bool = False) -> None:
     """Run netconvert with given input files and produce output network."""
     for f in [nodes, edges]:
         if not f.exists():
@@ -137,15 +152,33 @@ def _run_netconvert(netconvert: str, nodes: Path, edges: Path, output: Path,
         "--tls.default-type",  "static",
         "--crossings.guess",                   # Auto-add pedestrian crossings at TL junctions
         "--crossings.guess.speed-threshold", "13.89",
+        # Node-removal is netconvert's most expensive pass (it scales badly on
+        # large nets). It is already off by default; pin it so a larger
+        # follow-on network can't pick it up. Flags such as --no-turnarounds
+        # or --junctions.limit-turn-speed would change the connection set and
+        # break the link indices PHASE_SIGNALS is written against, so they stay
+        # at their defaults.
+        "--geometry.remove",   "false",
         "--no-warnings",
     ]
+    if verbose:
+        cmd.append("--verbose")
 
+    # Stream netconvert's output line by line instead of buffering it all:
+    # memory stays constant on big networks and --verbose shows progress
+    # live.  Only the last lines are kept, for the failure report.
     print(f"\n[RUN] netconvert ({label}) ...")
-    result = subprocess.run(cmd, capture_output=True, text=True)
-
-    if result.returncode != 0:
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1)
+    tail: deque[str] = deque(maxlen=50)
+    for line in proc.stdout:
+        if verbose:
+            print(f"     {line}", end="")
+        tail.append(line)
+
+    if proc.wait() != 0:
         print("[ERROR] netconvert failed:")
-        print(result.stderr)
+        print("".join(tail), end="")
         sys.exit(1)
 
     if not output.exists():
@@ -156,19 +189,21 @@ def _run_netconvert(netconvert: str, nodes: Path, edges: Path, output: Path,
     print(f"[OK] Network built → {output}")
     print(f"     File size: {size_kb:.1f} KB")
 
-    # Quick sanity check
-    content = output.read_text()
-    n_junctions = content.count("<junction ")
-    n_edges     = content.count("<edge ")
-    n_tls       = content.count("<tlLogic ")
+    # Quick sanity check — one regex pass over the memory-mapped file rather
+    # than decoding it into a str and scanning it once per tag
+    counts = {b"junction": 0, b"edge": 0, b"tlLogic": 0}
+    with open(output, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for m in _NET_ELEMENT_RE.finditer(mm):
+            counts[m.group(1)] += 1
+    n_junctions = counts[b"junction"]
+    n_edges     = counts[b"edge"]
+    n_tls       = counts[b"tlLogic"]
     print(f"     Junctions: {n_junctions}  |  Edges: {n_edges}  |  Traffic lights: {n_tls}")
 
 
-def build_network(corridor: bool = False):
+def build_network(corridor: bool = False, verbose: bool = False):
     mode = "Corridor (3 Junctions)" if corridor else "Single Junction"
-    print("=" * 60)
-    print(f"  ATCS-GH Network Builder — {mode}")
-    print("=" * 60)
+    print("\n".join(["=" * 60, f"  ATCS-GH Network Builder — {mode}", "=" * 60]))
 
     # 1. Verify SUMO
     sumo_home = find_sumo_home()
@@ -188,20 +223,24 @@ def build_network(corridor: bool = False):
 
     if corridor:
         _run_netconvert(netconvert, CORR_NODES_FILE, CORR_EDGES_FILE,
-                        CORR_OUTPUT_NET, "corridor")
-        print("\n" + "=" * 60)
-        print("  Corridor network ready. Next steps:")
-        print("  1.  python scripts/train_corridor.py")
-        print("  2.  python scripts/run_corridor_baseline.py --gui")
-        print("=" * 60 + "\n")
+                        CORR_OUTPUT_NET, "corridor", verbose)
+        print("\n".join([
+            "\n" + "=" * 60,
+            "  Corridor network ready. Next steps:",
+            "  1.  python scripts/train_corridor.py",
+            "  2.  python scripts/run_corridor_baseline.py --gui",
+            "=" * 60 + "\n",
+        ]))
     else:
         _run_netconvert(netconvert, NODES_FILE, EDGES_FILE,
-                        OUTPUT_NET, "single junction")
-        print("\n" + "=" * 60)
-        print("  Network ready. Next steps:")
-        print("  1.  python scripts/run_baseline.py")
-        print("  2.  python scripts/run_baseline.py --gui   (visual mode)")
-        print("=" * 60 + "\n")
+                        OUTPUT_NET, "single junction", verbose)
+        print("\n".join([
+            "\n" + "=" * 60,
+            "  Network ready. Next steps:",
+            "  1.  python scripts/run_baseline.py",
+            "  2.  python scripts/run_baseline.py --gui   (visual mode)",
+            "=" * 60 + "\n",
+        ]))
 
 
 if __name__ == "__main__":
@@ -210,13 +249,15 @@ if __name__ == "__main__":
                         help="Build 3-junction corridor network instead of single junction")
     parser.add_argument("--all", action="store_true",
                         help="Build both single junction and corridor networks")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Run netconvert with --verbose and stream its output")
     args = parser.parse_args()
 
     if args.all:
-        build_network(corridor=False)
+        build_network(corridor=False, verbose=args.verbose)
         print()
-        build_network(corridor=True)
+        build_network(corridor=True, verbose=args.verbose)
     elif args.corridor:
-        build_network(corridor=True)
+        build_network(corridor=True, verbose=args.verbose)
     else:
-        build_network(corridor=False)
+        build_network(corridor=False, verbose=args.verbose)
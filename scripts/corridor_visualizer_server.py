@@ -58,6 +58,10 @@ except ImportError as e:
     print(f"[ERROR] Cannot import TraCI: {e}")
     sys.exit(1)
 
+# Query the simulation through the same backend (libsumo or socket TraCI)
+# that CorridorEnv connected with.
+from corridor_env import traci
+
 import websockets
 from dqn_agent import DQNAgent
 
@@ -210,6 +214,19 @@ async def broadcast(packet: dict):
 
 # ── Vehicle data collection (all junctions) ─────────────────────────────────
 
+# Vehicle type never changes after departure, so each ID's type is fetched
+# once and reused by every later broadcast. Arrived IDs are pruned each
+# collection; the cache is cleared per run since IDs repeat across seeds.
+_vtype_cache: dict[str, str] = {}
+
+
+def _vehicle_type(vid: str) -> str:
+    typ = _vtype_cache.get(vid)
+    if typ is None:
+        typ = _vtype_cache[vid] = traci.vehicle.getTypeID(vid)
+    return typ
+
+
 def _collect_vehicle_data() -> list[dict]:
     """
     Collect position, speed, angle, and type for every vehicle
@@ -218,6 +235,9 @@ def _collect_vehicle_data() -> list[dict]:
     vehicles: list[dict] = []
     seen: set[str] = set()
 
+    for vid in traci.simulation.getArrivedIDList():
+        _vtype_cache.pop(vid, None)
+
     # Scan all incoming + outgoing edges
     for edge in ALL_EDGES:
         try:
@@ -232,7 +252,7 @@ def _collect_vehicle_data() -> list[dict]:
                     "y":     round(y, 2),
                     "speed": round(traci.vehicle.getSpeed(vid), 2),
                     "angle": round(traci.vehicle.getAngle(vid), 1),
-                    "type":  traci.vehicle.getTypeID(vid),
+                    "type":  _vehicle_type(vid),
                     "edge":  edge,
                 })
         except traci.exceptions.TraCIException:
@@ -253,7 +273,7 @@ def _collect_vehicle_data() -> list[dict]:
                     "y":     round(y, 2),
                     "speed": round(traci.vehicle.getSpeed(vid), 2),
                     "angle": round(traci.vehicle.getAngle(vid), 1),
-                    "type":  traci.vehicle.getTypeID(vid),
+                    "type":  _vehicle_type(vid),
                     "edge":  road,
                 })
     except traci.exceptions.TraCIException:
@@ -415,6 +435,7 @@ async def simulation_loop(mode: str, model_dir: Path, speed: float):
     try:
         while True:
             seed = 42 + run_count * 137
+            _vtype_cache.clear()
             states = env.reset(seed=seed)
             run_count += 1
             print(f"\n[SIM] Run #{run_count} started (seed={seed})")
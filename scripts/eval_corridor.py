@@ -21,6 +21,11 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "ai"))
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
+# libsumo (the env's default backend) cannot drive sumo-gui — fall back to
+# the TraCI socket client when the GUI is requested.
+if "--gui" in sys.argv:
+    os.environ.setdefault("ATCS_LIBSUMO", "0")
+
 from corridor_env import (
     CorridorEnv, JUNCTION_IDS, STATE_SIZE, ACTION_SIZE,
     ACTION_HOLD, ACTION_NAMES,
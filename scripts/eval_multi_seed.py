@@ -10,6 +10,7 @@ Usage:
     python scripts/eval_multi_seed.py                    # 5 seeds
     python scripts/eval_multi_seed.py --seeds 10         # 10 seeds
     python scripts/eval_multi_seed.py --model ai/best_model.pth
+    python scripts/eval_multi_seed.py --seeds 10 --workers 4   # 4 SUMO processes
 """
 
 import os
@@ -18,8 +19,13 @@ import csv
 import time
 import shutil
 import argparse
+import statistics
+import multiprocessing
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 
 # -- SUMO / TraCI setup -------------------------------------------------------
 
@@ -69,6 +75,9 @@ from traffic_env import (
     MAX_QUEUE, MAX_QUEUE_LANE, MAX_SPEED, MAX_WAIT, MAX_PHASE_T,
     WALKING_AREAS, MAX_PED_QUEUE,
 )
+# Drive SUMO through the same backend TrafficEnv selected (libsumo in-process
+# unless ATCS_LIBSUMO=0); MetricsLogger follows the same switch.
+from traffic_env import traci
 
 SIM_DIR      = PROJECT_ROOT / "simulation"
 DATA_DIR     = PROJECT_ROOT / "data"
@@ -78,6 +87,7 @@ SIM_DURATION = 7200
 
 # -- Helpers (mirror run_ai.py) ------------------------------------------------
 
+@lru_cache(maxsize=None)          # resolved once, not per episode
 def find_sumo_binary() -> str:
     for p in [os.path.join(SUMO_HOME, "bin", "sumo"),
               shutil.which("sumo"),
@@ -87,40 +97,73 @@ def find_sumo_binary() -> str:
     sys.exit("[ERROR] sumo binary not found")
 
 
+# State is assembled in place into one buffer (no per-call arrays, concatenate
+# or astype), scaled by reciprocals exactly as TrafficEnv._build_state does.
+_N_LANES = len(INCOMING_LANES)
+_N_EDGES = len(INCOMING_EDGES)
+_STATE_BUF = np.zeros(STATE_SIZE, dtype=np.float32)
+_INV_MAX_QUEUE_LANE = 1.0 / MAX_QUEUE_LANE
+_INV_MAX_SPEED      = 1.0 / MAX_SPEED
+_INV_MAX_WAIT       = 1.0 / MAX_WAIT
+_INV_MAX_QUEUE      = 1.0 / MAX_QUEUE
+_INV_MAX_PHASE_T    = 1.0 / MAX_PHASE_T
+_INV_MAX_PED_QUEUE  = 1.0 / MAX_PED_QUEUE
+
+# Vehicle lane IDs per incoming edge (lane 0 is the sidewalk).  Every seed
+# runs on the same network, so they are resolved once for the whole process.
+_EDGE_LANES: dict[str, tuple[str, ...]] = {}
+
+
+def _edge_lanes(edge: str) -> tuple[str, ...]:
+    lanes = _EDGE_LANES.get(edge)
+    if lanes is None:
+        try:
+            n_lanes = traci.edge.getLaneNumber(edge)
+        except traci.exceptions.TraCIException:
+            n_lanes = 0
+        lanes = _EDGE_LANES[edge] = tuple(f"{edge}_{idx}" for idx in range(1, n_lanes))
+    return lanes
+
+
 def build_state(phase, phase_timer, _in_yellow):
-    """Build 42-dim state vector from live SUMO data."""
-    lane_queues = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_speeds = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_waits  = np.zeros(len(INCOMING_LANES), dtype=np.float32)
+    """Build 41-dim state vector from live SUMO data."""
+    buf = _STATE_BUF
+    q, sp, w = 0, _N_LANES, 2 * _N_LANES          # per-lane block offsets
     for i, lane_id in enumerate(INCOMING_LANES):
         try:
-            lane_queues[i] = float(traci.lane.getLastStepHaltingNumber(lane_id))
-            lane_speeds[i] = float(traci.lane.getLastStepMeanSpeed(lane_id))
-            lane_waits[i]  = float(traci.lane.getWaitingTime(lane_id))
+            buf[q + i]  = traci.lane.getLastStepHaltingNumber(lane_id)
+            buf[sp + i] = traci.lane.getLastStepMeanSpeed(lane_id)
+            buf[w + i]  = traci.lane.getWaitingTime(lane_id)
         except traci.exceptions.TraCIException:
-            pass
-    approach_queues = np.zeros(len(INCOMING_EDGES), dtype=np.float32)
+            buf[q + i] = buf[sp + i] = buf[w + i] = 0.0
+    buf[q:sp]  *= _INV_MAX_QUEUE_LANE
+    buf[sp:w]  *= _INV_MAX_SPEED
+    buf[w:3 * _N_LANES] *= _INV_MAX_WAIT
+
+    a = 3 * _N_LANES                               # approach queues
     for i, edge in enumerate(INCOMING_EDGES):
+        total_q = 0
         try:
-            n_lanes = traci.edge.getLaneNumber(edge)
-            for idx in range(1, n_lanes):  # skip lane 0 (sidewalk)
-                approach_queues[i] += traci.lane.getLastStepHaltingNumber(f"{edge}_{idx}")
+            for lane_id in _edge_lanes(edge):
+                total_q += traci.lane.getLastStepHaltingNumber(lane_id)
         except traci.exceptions.TraCIException:
             pass
-    phase_vec = np.zeros(NUM_PHASES, dtype=np.float32)
-    phase_vec[phase] = 1.0
-    t_norm = np.float32(min(phase_timer / MAX_PHASE_T, 1.0))
-    ped_counts = np.zeros(len(WALKING_AREAS), dtype=np.float32)
+        buf[a + i] = total_q
+    buf[a:a + _N_EDGES] *= _INV_MAX_QUEUE
+
+    ph = a + _N_EDGES                              # phase one-hot + timer
+    buf[ph:ph + NUM_PHASES] = 0.0
+    buf[ph + phase] = 1.0
+    buf[ph + NUM_PHASES] = min(phase_timer * _INV_MAX_PHASE_T, 1.0)
+
+    pd = ph + NUM_PHASES + 1                       # pedestrian counts
     for i, wa in enumerate(WALKING_AREAS):
         try:
-            ped_counts[i] = float(len(traci.edge.getLastStepPersonIDs(wa)))
+            buf[pd + i] = len(traci.edge.getLastStepPersonIDs(wa))
         except traci.exceptions.TraCIException:
-            pass
-    return np.concatenate([
-        lane_queues / MAX_QUEUE_LANE, lane_speeds / MAX_SPEED, lane_waits / MAX_WAIT,
-        approach_queues / MAX_QUEUE, phase_vec, [t_norm],
-        ped_counts / MAX_PED_QUEUE,
-    ]).astype(np.float32)
+            buf[pd + i] = 0.0
+    buf[pd:pd + len(WALKING_AREAS)] *= _INV_MAX_PED_QUEUE
+    return buf.copy()
 
 
 def _can_switch(phase, phase_timer, in_yellow):
@@ -152,11 +195,21 @@ def _install_ai_tl_program():
 
 # -- Single-seed evaluation ---------------------------------------------------
 
+# True while a SUMO connection started by run_one_seed is still open
+_sumo_open = False
+
+
 def run_one_seed(agent: DQNAgent, seed: int,
-                 route_file: str | None = None) -> dict:
-    """Run one 7200s evaluation episode with a given SUMO seed."""
-    sumo_cmd = [
-        find_sumo_binary(),
+                 route_file: str | None = None, reuse: bool = False) -> dict:
+    """
+    Run one 7200s evaluation episode with a given SUMO seed.
+
+    With reuse=True the SUMO connection is left open afterwards, and a later
+    reuse call reinitialises that same process with traci.load() instead of
+    paying process start-up again; the caller closes it when done.
+    """
+    global _sumo_open
+    sumo_args = [
         "-c", str(CONFIG_FILE),
         "--step-length", "1.0",
         "--no-warnings",
@@ -164,8 +217,12 @@ def run_one_seed(agent: DQNAgent, seed: int,
         "--seed", str(seed),
     ]
     if route_file is not None:
-        sumo_cmd += ["--route-files", str(route_file)]
-    traci.start(sumo_cmd)
+        sumo_args += ["--route-files", str(route_file)]
+    if reuse and _sumo_open:
+        traci.load(sumo_args)
+    else:
+        traci.start([find_sumo_binary()] + sumo_args)
+        _sumo_open = True
     _install_ai_tl_program()
 
     phase = NS_THROUGH
@@ -207,10 +264,12 @@ def run_one_seed(agent: DQNAgent, seed: int,
             logger.step(current_time=float(step_num),
                         tl_phase_name=PHASE_NAMES.get(phase, f"phase_{phase}"))
 
-            if traci.simulation.getMinExpectedNumber() == 0:
+            if logger.min_expected == 0:
                 break
     finally:
-        traci.close()
+        if not reuse:
+            traci.close()
+            _sumo_open = False
 
     logger.save()
     stats = logger.summary_stats()
@@ -223,6 +282,55 @@ def run_one_seed(agent: DQNAgent, seed: int,
     }
 
 
+# Per-worker agent, built once by _init_worker when the pool starts
+_worker_agent: DQNAgent | None = None
+
+
+def _init_worker(policy_state: dict) -> None:
+    """
+    Process-pool initializer: rebuild the agent from the parent's weights.
+
+    The parent loads the checkpoint once and ships only the policy-net
+    state_dict (CPU tensors) to each worker, instead of every seed reloading
+    the file from disk.  Torch is pinned to one thread so N concurrent seeds
+    don't oversubscribe the cores SUMO needs.  The agent is CPU-only and
+    uncompiled: one greedy forward per decision doesn't justify a GPU
+    context, a torch.compile and a pinned replay buffer in every worker.
+    """
+    global _worker_agent
+    import torch
+    torch.set_num_threads(1)
+
+    agent = DQNAgent(state_size=STATE_SIZE, action_size=ACTION_SIZE,
+                     device="cpu", compile_model=False)
+    agent.policy_net.load_state_dict(policy_state)
+    agent.set_eval_mode()
+    _worker_agent = agent
+
+
+def _run_seed_worker(job: tuple[int, str | None]) -> tuple[dict, float]:
+    """Process-pool entry point: evaluate one seed in its own SUMO instance."""
+    seed, route_file = job
+    t0 = time.time()
+    r = run_one_seed(_worker_agent, seed, route_file=route_file)
+    return r, time.time() - t0
+
+
+def _run_serial(agent: DQNAgent, seed_list: list[int],
+                route_file: str | None):
+    """Evaluate every seed in this process on one SUMO instance, reloaded per seed."""
+    global _sumo_open
+    try:
+        for seed in seed_list:
+            t0 = time.time()
+            r = run_one_seed(agent, seed, route_file=route_file, reuse=True)
+            yield r, time.time() - t0
+    finally:
+        if _sumo_open:
+            traci.close()
+            _sumo_open = False
+
+
 # -- Main ---------------------------------------------------------------------
 
 def main():
@@ -231,6 +339,9 @@ def main():
     parser.add_argument("--model", type=str, default=str(DEFAULT_MODEL))
     parser.add_argument("--scenario", type=str, default=None,
                         help="Demand scenario name (e.g. evening_rush). Uses default routes if not set.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Seeds evaluated concurrently, one SUMO process each "
+                             "(default: min(seeds, CPU count); 1 = serial)")
     args = parser.parse_args()
 
     model_path = Path(args.model)
@@ -242,43 +353,70 @@ def main():
     agent.set_eval_mode()
 
     seed_list = [42, 271, 503, 719, 997, 1231, 1567, 1811, 2039, 2281][:args.seeds]
-
-    print("\n" + "=" * 62)
-    print("  ATCS-GH -- Multi-Seed AI Evaluation (Achimota Junction)")
-    print("=" * 62)
-    print(f"  Model : {model_path.name}")
-    print(f"  Seeds : {args.seeds}  ->  {seed_list}")
-    print("=" * 62)
-    print(f"\n  {'Seed':>6}  {'Avg Wait':>9}  {'Peak Q':>7}  {'Completed':>10}  {'Throughput':>11}  {'Time':>6}")
-    print("  " + "-" * 58)
+    workers = args.workers or min(len(seed_list), os.cpu_count() or 1)
+    workers = max(1, min(workers, len(seed_list)))
+
+    # Header and summary are each emitted as one write; per-seed rows are
+    # flushed individually so progress shows up live even when redirected.
+    print("\n".join([
+        "\n" + "=" * 62,
+        "  ATCS-GH -- Multi-Seed AI Evaluation (Achimota Junction)",
+        "=" * 62,
+        f"  Model : {model_path.name}",
+        f"  Seeds : {args.seeds}  ->  {seed_list}",
+        f"  Workers: {workers}",
+        "=" * 62,
+        f"\n  {'Seed':>6}  {'Avg Wait':>9}  {'Peak Q':>7}  {'Completed':>10}  {'Throughput':>11}  {'Time':>6}",
+        "  " + "-" * 58,
+    ]), flush=True)
 
     route_file = None
     if args.scenario:
         route_file = str(SIM_DIR / "scenarios" / f"{args.scenario}.rou.xml")
 
+    # Seeds are independent SUMO runs, so they parallelise across processes
+    # with no communication; pool.map yields results in seed order.  Workers
+    # are spawned, not forked: the parent has already initialised torch (and
+    # possibly CUDA) for its own agent, which a forked child cannot reuse.
+    # A serial run instead keeps one SUMO process and traci.load()s each
+    # seed into it.
     results = []
-    for seed in seed_list:
-        t0 = time.time()
-        r = run_one_seed(agent, seed, route_file=route_file)
-        elapsed = time.time() - t0
-        results.append(r)
-        print(f"  {seed:>6}  {r['avg_wait']:>8.2f}s  {r['peak_queue']:>7}  "
-              f"{r['completed']:>10,}  {r['throughput']:>8.1f} v/m  {elapsed:>5.0f}s")
+    if workers > 1:
+        policy_state = {k: v.detach().cpu()
+                        for k, v in agent.policy_net.state_dict().items()}
+        pool = ProcessPoolExecutor(max_workers=workers,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker,
+                                   initargs=(policy_state,))
+    else:
+        pool = nullcontext()
+    with pool:
+        outcomes = (pool.map(_run_seed_worker, [(seed, route_file) for seed in seed_list])
+                    if workers > 1 else _run_serial(agent, seed_list, route_file))
+        for r, elapsed in outcomes:
+            results.append(r)
+            print(f"  {r['seed']:>6}  {r['avg_wait']:>8.2f}s  {r['peak_queue']:>7}  "
+                  f"{r['completed']:>10,}  {r['throughput']:>8.1f} v/m  {elapsed:>5.0f}s",
+                  flush=True)
 
     waits = [r["avg_wait"] for r in results]
     queues = [r["peak_queue"] for r in results]
     completed = [r["completed"] for r in results]
 
-    mean_w = np.mean(waits)
-    std_w = np.std(waits)
-
-    print("\n" + "=" * 62)
-    print("  SUMMARY")
-    print("=" * 62)
-    print(f"  Avg wait time  :  {mean_w:.2f} +/- {std_w:.2f}s  (range: {min(waits):.1f}-{max(waits):.1f})")
-    print(f"  Peak queue     :  {np.mean(queues):.1f} +/- {np.std(queues):.1f}")
-    print(f"  Completed vehs :  {np.mean(completed):.0f} +/- {np.std(completed):.0f}")
-    print()
+    # 5-10 values per metric: the stdlib reductions beat NumPy's array
+    # dispatch here (pstdev is the population std np.std computed)
+    mean_w = statistics.fmean(waits)
+    std_w = statistics.pstdev(waits)
+
+    out = [
+        "\n" + "=" * 62,
+        "  SUMMARY",
+        "=" * 62,
+        f"  Avg wait time  :  {mean_w:.2f} +/- {std_w:.2f}s  (range: {min(waits):.1f}-{max(waits):.1f})",
+        f"  Peak queue     :  {statistics.fmean(queues):.1f} +/- {statistics.pstdev(queues):.1f}",
+        f"  Completed vehs :  {statistics.fmean(completed):.0f} +/- {statistics.pstdev(completed):.0f}",
+        "",
+    ]
 
     baseline_csv = DATA_DIR / "baseline_results.csv"
     if baseline_csv.exists():
@@ -287,17 +425,18 @@ def main():
             rows = list(_csv.DictReader(f))
         bl_wait = sum(float(r["avg_wait_time_s"]) for r in rows) / len(rows)
         delta = (mean_w - bl_wait) / bl_wait * 100
-        print(f"  Baseline avg wait : {bl_wait:.2f}s")
-        print(f"  AI improvement    : {abs(delta):.1f}% {'BETTER' if delta < 0 else 'WORSE'}")
+        out.append(f"  Baseline avg wait : {bl_wait:.2f}s")
+        out.append(f"  AI improvement    : {abs(delta):.1f}% {'BETTER' if delta < 0 else 'WORSE'}")
 
-    print("=" * 62 + "\n")
+    out.append("=" * 62 + "\n")
 
     summary_path = DATA_DIR / "eval_multi_seed_summary.csv"
     with open(summary_path, "w", newline="") as f:
         w = csv.DictWriter(f, fieldnames=["seed", "avg_wait", "peak_queue", "completed", "throughput"])
         w.writeheader()
         w.writerows(results)
-    print(f"  Per-seed results -> {summary_path.relative_to(PROJECT_ROOT)}")
+    out.append(f"  Per-seed results -> {summary_path.relative_to(PROJECT_ROOT)}")
+    print("\n".join(out))
 
 
 if __name__ == "__main__":
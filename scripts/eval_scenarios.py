@@ -20,6 +20,7 @@ import time
 import shutil
 import argparse
 import numpy as np
+from functools import lru_cache
 from pathlib import Path
 
 # ── SUMO / TraCI bootstrapping ────────────────────────────────────────────────
@@ -70,6 +71,9 @@ from traffic_env import (
     MAX_QUEUE, MAX_QUEUE_LANE, MAX_SPEED, MAX_WAIT, MAX_PHASE_T,
     WALKING_AREAS, MAX_PED_QUEUE,
 )
+# Drive SUMO through the same backend TrafficEnv selected (libsumo in-process
+# unless ATCS_LIBSUMO=0); MetricsLogger follows the same switch.
+from traffic_env import traci
 
 SIM_DIR      = PROJECT_ROOT / "simulation"
 SCENARIO_DIR = SIM_DIR / "scenarios"
@@ -103,6 +107,7 @@ SCENARIO_NAMES = [
 
 # ── SUMO binary ──────────────────────────────────────────────────────────────
 
+@lru_cache(maxsize=None)          # resolved once, not per episode
 def find_sumo_binary() -> str:
     for p in [os.path.join(SUMO_HOME, "bin", "sumo"),
               shutil.which("sumo"),
@@ -116,40 +121,73 @@ def find_sumo_binary() -> str:
 # AI AGENT EVALUATION
 # ══════════════════════════════════════════════════════════════════════════════
 
+# State is assembled in place into one buffer (no per-call arrays, concatenate
+# or astype), scaled by reciprocals exactly as TrafficEnv._build_state does.
+_N_LANES = len(INCOMING_LANES)
+_N_EDGES = len(INCOMING_EDGES)
+_STATE_BUF = np.zeros(STATE_SIZE, dtype=np.float32)
+_INV_MAX_QUEUE_LANE = 1.0 / MAX_QUEUE_LANE
+_INV_MAX_SPEED      = 1.0 / MAX_SPEED
+_INV_MAX_WAIT       = 1.0 / MAX_WAIT
+_INV_MAX_QUEUE      = 1.0 / MAX_QUEUE
+_INV_MAX_PHASE_T    = 1.0 / MAX_PHASE_T
+_INV_MAX_PED_QUEUE  = 1.0 / MAX_PED_QUEUE
+
+# Vehicle lane IDs per incoming edge (lane 0 is the sidewalk).  Every scenario
+# runs on the same network, so they are resolved once for the whole process.
+_EDGE_LANES: dict[str, tuple[str, ...]] = {}
+
+
+def _edge_lanes(edge: str) -> tuple[str, ...]:
+    lanes = _EDGE_LANES.get(edge)
+    if lanes is None:
+        try:
+            n_lanes = traci.edge.getLaneNumber(edge)
+        except traci.exceptions.TraCIException:
+            n_lanes = 0
+        lanes = _EDGE_LANES[edge] = tuple(f"{edge}_{idx}" for idx in range(1, n_lanes))
+    return lanes
+
+
 def build_state(phase, phase_timer, _in_yellow):
-    """Build 42-dim state vector from live SUMO data."""
-    lane_queues = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_speeds = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_waits  = np.zeros(len(INCOMING_LANES), dtype=np.float32)
+    """Build 41-dim state vector from live SUMO data."""
+    buf = _STATE_BUF
+    q, sp, w = 0, _N_LANES, 2 * _N_LANES          # per-lane block offsets
     for i, lane_id in enumerate(INCOMING_LANES):
         try:
-            lane_queues[i] = float(traci.lane.getLastStepHaltingNumber(lane_id))
-            lane_speeds[i] = float(traci.lane.getLastStepMeanSpeed(lane_id))
-            lane_waits[i]  = float(traci.lane.getWaitingTime(lane_id))
+            buf[q + i]  = traci.lane.getLastStepHaltingNumber(lane_id)
+            buf[sp + i] = traci.lane.getLastStepMeanSpeed(lane_id)
+            buf[w + i]  = traci.lane.getWaitingTime(lane_id)
         except traci.exceptions.TraCIException:
-            pass
-    approach_queues = np.zeros(len(INCOMING_EDGES), dtype=np.float32)
+            buf[q + i] = buf[sp + i] = buf[w + i] = 0.0
+    buf[q:sp]  *= _INV_MAX_QUEUE_LANE
+    buf[sp:w]  *= _INV_MAX_SPEED
+    buf[w:3 * _N_LANES] *= _INV_MAX_WAIT
+
+    a = 3 * _N_LANES                               # approach queues
     for i, edge in enumerate(INCOMING_EDGES):
+        total_q = 0
         try:
-            n_lanes = traci.edge.getLaneNumber(edge)
-            for idx in range(1, n_lanes):  # skip lane 0 (sidewalk)
-                approach_queues[i] += traci.lane.getLastStepHaltingNumber(f"{edge}_{idx}")
+            for lane_id in _edge_lanes(edge):
+                total_q += traci.lane.getLastStepHaltingNumber(lane_id)
         except traci.exceptions.TraCIException:
             pass
-    phase_vec = np.zeros(NUM_PHASES, dtype=np.float32)
-    phase_vec[phase] = 1.0
-    t_norm = np.float32(min(phase_timer / MAX_PHASE_T, 1.0))
-    ped_counts = np.zeros(len(WALKING_AREAS), dtype=np.float32)
+        buf[a + i] = total_q
+    buf[a:a + _N_EDGES] *= _INV_MAX_QUEUE
+
+    ph = a + _N_EDGES                              # phase one-hot + timer
+    buf[ph:ph + NUM_PHASES] = 0.0
+    buf[ph + phase] = 1.0
+    buf[ph + NUM_PHASES] = min(phase_timer * _INV_MAX_PHASE_T, 1.0)
+
+    pd = ph + NUM_PHASES + 1                       # pedestrian counts
     for i, wa in enumerate(WALKING_AREAS):
         try:
-            ped_counts[i] = float(len(traci.edge.getLastStepPersonIDs(wa)))
+            buf[pd + i] = len(traci.edge.getLastStepPersonIDs(wa))
         except traci.exceptions.TraCIException:
-            pass
-    return np.concatenate([
-        lane_queues / MAX_QUEUE_LANE, lane_speeds / MAX_SPEED, lane_waits / MAX_WAIT,
-        approach_queues / MAX_QUEUE, phase_vec, [t_norm],
-        ped_counts / MAX_PED_QUEUE,
-    ]).astype(np.float32)
+            buf[pd + i] = 0.0
+    buf[pd:pd + len(WALKING_AREAS)] *= _INV_MAX_PED_QUEUE
+    return buf.copy()
 
 
 def _can_switch(phase, phase_timer, in_yellow):
@@ -232,7 +270,7 @@ def run_ai_episode(agent: DQNAgent, seed: int, route_file: str,
             logger.step(current_time=float(step_num),
                         tl_phase_name=PHASE_NAMES.get(phase, f"phase_{phase}"))
 
-            if traci.simulation.getMinExpectedNumber() == 0:
+            if logger.min_expected == 0:
                 break
     finally:
         traci.close()
@@ -298,7 +336,7 @@ def run_baseline_episode(seed: int, route_file: str,
                 phase_name = "unknown"
             logger.step(current_time=float(step_num), tl_phase_name=phase_name)
 
-            if traci.simulation.getMinExpectedNumber() == 0:
+            if logger.min_expected == 0:
                 break
     finally:
         traci.close()
@@ -21,16 +21,45 @@ Usage:
     # After the loop:
     logger.save()
     stats = logger.summary_stats()
+
+Rows are streamed to the CSV as they are produced and the summary is kept
+as running aggregates, so memory use does not grow with episode length.
 """
 
+import os
 import csv
+from collections import deque
 from pathlib import Path
-import traci
+
+# The logger must query the simulation its caller started, so it follows the
+# project-wide backend switch used by ai/traffic_env: libsumo (in-process,
+# no socket round-trip per call) unless ATCS_LIBSUMO=0, which GUI runs set.
+if os.environ.get("ATCS_LIBSUMO", "1") == "1":
+    try:
+        import libsumo as traci
+    except ImportError:
+        import traci
+else:
+    import traci
+
+tc = traci.constants
+
+# TraCI variables subscribed once and read back each step (one bulk read
+# instead of three getter round-trips per lane)
+_LANE_VARS = (tc.VAR_WAITING_TIME,
+              tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+              tc.LAST_STEP_VEHICLE_NUMBER)
+_SIM_VARS  = (tc.VAR_ARRIVED_VEHICLES_NUMBER,
+              tc.VAR_MIN_EXPECTED_VEHICLES)
 
 
 # Edges whose incoming lanes we measure (vehicles approaching the junction)
 INCOMING_EDGES  = ["ACH_N2J", "ACH_S2J", "AGG_E2J", "GUG_W2J"]
 
+# Fixed leading CSV columns, in record order; per-lane pairs follow
+_BASE_FIELDS = ("time_s", "tl_phase", "avg_wait_time_s", "total_queue_vehicles",
+                "throughput_veh_per_min", "completed_vehicles")
+
 # Rolling window length for throughput calculation (seconds)
 THROUGHPUT_WINDOW_S = 60
 
@@ -52,24 +81,47 @@ class MetricsLogger:
         self.output_path    = Path(output_path)
         self.incoming_edges = incoming_edges
 
-        # Collected rows — each element is one simulation step
-        self.records: list[dict] = []
+        # CSV is opened on the first step(), once the column set is known;
+        # each record is written immediately rather than held in memory
+        self._file   = None
+        self._writer = None
+        self.n_rows: int = 0
+
+        # Running aggregates for summary_stats()
+        self._wait_sum:   float = 0.0
+        self._queue_peak: int   = 0
+        self._tput_sum:   int   = 0
+        self._tput_peak:  int   = 0
 
-        # Rolling arrivals buffer for throughput: list of (timestamp, count)
-        self._recent_arrivals: list[tuple[float, int]] = []
+        # Rolling arrivals buffer for throughput: (timestamp, count) in time
+        # order, with a running sum so the window total needs no re-summing
+        self._recent_arrivals: deque[tuple[float, int]] = deque()
+        self._throughput_sum: int = 0
 
         # Cumulative arrived vehicles
         self.total_arrived: int = 0
 
-        # Per-edge running stats (for efficient summary without re-scanning records)
-        self.edge_stats: dict[str, dict] = {
-            edge: {"total_wait": 0.0, "max_queue": 0, "samples": 0}
-            for edge in incoming_edges
-        }
+        # Vehicles still running or waiting to depart, as of the last step()
+        # (0 means the demand is exhausted — callers can stop the loop)
+        self.min_expected: int | None = None
+
+        # Per-edge running stats, one flat list per field indexed like
+        # incoming_edges (the edge_stats dict view is only built on demand)
+        n_edges = len(incoming_edges)
+        self._edge_total_wait: list[float] = [0.0] * n_edges
+        self._edge_max_queue:  list[int]   = [0] * n_edges
+        self._edge_samples:    list[int]   = [0] * n_edges
+        self._edge_lanes: list[tuple[int, tuple[str, ...]]] = []
+
+        # Subscribed lane IDs — resolved on the first step() (TraCI must be
+        # connected by then) and fixed for the run, since lanes never change
+        self._lane_ids: list[str] | None = None
+        self._lane_cols: list[tuple[str, str, str]] = []
+        self._fieldnames: list[str] = []
 
     # ── Public API ────────────────────────────────────────────────────────────
 
-    def step(self, current_time: float, tl_phase_name: str) -> dict:
+    def step(self, current_time: float, tl_phase_name: str) -> list:
         """
         Call once per simulation step immediately after traci.simulationStep().
 
@@ -78,20 +130,29 @@ class MetricsLogger:
             tl_phase_name:  human-readable phase label, e.g. "NS_GREEN"
 
         Returns:
-            The dict record appended this step (useful for real-time display).
+            The row written this step (useful for real-time display), in
+            the CSV's column order: time_s, tl_phase, avg_wait_time_s,
+            total_queue_vehicles, throughput_veh_per_min, completed_vehicles,
+            then a wait/queue pair per lane.
         """
+        if self._lane_ids is None:
+            self._subscribe()
+
         # Track vehicles that finished their journey this step
-        n_arrived = traci.simulation.getArrivedNumber()
+        sim_res = traci.simulation.getSubscriptionResults()
+        n_arrived = sim_res[tc.VAR_ARRIVED_VEHICLES_NUMBER]
+        self.min_expected = sim_res[tc.VAR_MIN_EXPECTED_VEHICLES]
         self.total_arrived += n_arrived
+        recent = self._recent_arrivals
         if n_arrived > 0:
-            self._recent_arrivals.append((current_time, n_arrived))
+            recent.append((current_time, n_arrived))
+            self._throughput_sum += n_arrived
 
-        # Prune arrivals outside the rolling window
+        # Prune arrivals outside the rolling window (oldest are at the left)
         cutoff = current_time - THROUGHPUT_WINDOW_S
-        self._recent_arrivals = [
-            (t, n) for t, n in self._recent_arrivals if t >= cutoff
-        ]
-        throughput = sum(n for _, n in self._recent_arrivals)
+        while recent and recent[0][0] < cutoff:
+            self._throughput_sum -= recent.popleft()[1]
+        throughput = self._throughput_sum
 
         # Collect per-lane metrics from TraCI
         lane_metrics = self._collect_lane_metrics()
@@ -104,39 +165,42 @@ class MetricsLogger:
         # Update edge-level aggregates (used in summary_stats)
         self._update_edge_stats(lane_metrics)
 
-        # Build the record for this step
-        record: dict = {
-            "time_s":                 int(current_time),
-            "tl_phase":               tl_phase_name,
-            "avg_wait_time_s":        avg_wait,
-            "total_queue_vehicles":   total_queue,
-            "throughput_veh_per_min": throughput,
-            "completed_vehicles":     self.total_arrived,
-        }
+        # Build the row for this step (a plain list in _fieldnames order —
+        # csv.writer skips DictWriter's per-field key lookups)
+        row = [int(current_time), tl_phase_name, avg_wait, total_queue,
+               throughput, self.total_arrived]
 
         # Append one column pair per lane (sorted for consistent CSV column order)
-        for lane_id, m in sorted(lane_metrics.items()):
-            record[f"{lane_id}_wait_s"] = m["wait_time"]
-            record[f"{lane_id}_queue"]  = m["queue_length"]
-
-        self.records.append(record)
-        return record
+        for lane_id, _wait_col, _queue_col in self._lane_cols:
+            m = lane_metrics[lane_id]
+            row.append(m["wait_time"])
+            row.append(m["queue_length"])
+
+        if self._writer is None:
+            self.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._file   = open(self.output_path, "w", newline="")
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(self._fieldnames)
+        self._writer.writerow(row)
+
+        self.n_rows     += 1
+        self._wait_sum  += avg_wait
+        self._tput_sum  += throughput
+        if total_queue > self._queue_peak:
+            self._queue_peak = total_queue
+        if throughput > self._tput_peak:
+            self._tput_peak = throughput
+        return row
 
     def save(self) -> None:
-        """Write all collected records to CSV. Creates parent dirs if needed."""
-        if not self.records:
+        """Flush and close the CSV written during the run."""
+        if self._file is None:
             print("[MetricsLogger] No data to save.")
             return
 
-        self.output_path.parent.mkdir(parents=True, exist_ok=True)
-        fieldnames = list(self.records[0].keys())
-
-        with open(self.output_path, "w", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(self.records)
-
-        print(f"[MetricsLogger] {len(self.records):,} rows saved → {self.output_path}")
+        self._file.close()
+        self._file = None
+        print(f"[MetricsLogger] {self.n_rows:,} rows saved → {self.output_path}")
 
     def summary_stats(self) -> dict:
         """
@@ -147,61 +211,95 @@ class MetricsLogger:
             overall_avg_wait, peak_queue, avg_throughput, peak_throughput,
             total_completed, edge_stats
         """
-        if not self.records:
+        if not self.n_rows:
             return {}
 
-        waits       = [r["avg_wait_time_s"]        for r in self.records]
-        queues      = [r["total_queue_vehicles"]    for r in self.records]
-        throughputs = [r["throughput_veh_per_min"]  for r in self.records]
-
         return {
-            "overall_avg_wait":  round(sum(waits) / len(waits), 2),
-            "peak_queue":        max(queues),
-            "avg_throughput":    round(sum(throughputs) / len(throughputs), 2),
-            "peak_throughput":   max(throughputs),
+            "overall_avg_wait":  round(self._wait_sum / self.n_rows, 2),
+            "peak_queue":        self._queue_peak,
+            "avg_throughput":    round(self._tput_sum / self.n_rows, 2),
+            "peak_throughput":   self._tput_peak,
             "total_completed":   self.total_arrived,
             "edge_stats":        self.edge_stats,
         }
 
+    @property
+    def edge_stats(self) -> dict[str, dict]:
+        """Per-edge totals: {edge: {"total_wait", "max_queue", "samples"}}."""
+        return {
+            edge: {"total_wait": self._edge_total_wait[i],
+                   "max_queue":  self._edge_max_queue[i],
+                   "samples":    self._edge_samples[i]}
+            for i, edge in enumerate(self.incoming_edges)
+        }
+
     # ── Private helpers ───────────────────────────────────────────────────────
 
-    def _collect_lane_metrics(self) -> dict[str, dict]:
-        """Fetch wait time, queue length, and vehicle count for all incoming lanes."""
-        metrics: dict[str, dict] = {}
+    def _subscribe(self) -> None:
+        """
+        Subscribe to every lane of the incoming edges plus the arrival and
+        still-expected vehicle counts.
 
+        SUMO then pushes the values back with each simulationStep, so
+        _collect_lane_metrics is a single bulk read per step.  Lanes the
+        network doesn't have are skipped here, once, instead of per step.
+        """
+        self._lane_ids = []
         for edge_id in self.incoming_edges:
             try:
                 n_lanes = traci.edge.getLaneNumber(edge_id)
             except traci.exceptions.TraCIException:
-                continue  # Edge not yet loaded
+                continue  # Edge not in this network
 
+            edge_lanes = []
             for idx in range(n_lanes):
                 lane_id = f"{edge_id}_{idx}"
                 try:
-                    metrics[lane_id] = {
-                        "wait_time":    round(traci.lane.getWaitingTime(lane_id), 2),
-                        "queue_length": traci.lane.getLastStepHaltingNumber(lane_id),
-                        "veh_count":    traci.lane.getLastStepVehicleNumber(lane_id),
-                    }
+                    traci.lane.subscribe(lane_id, _LANE_VARS)
                 except traci.exceptions.TraCIException:
-                    pass  # Lane may not exist yet at t=0
+                    continue
+                edge_lanes.append(lane_id)
+            self._lane_ids += edge_lanes
+            if edge_lanes:
+                self._edge_lanes.append(
+                    (self.incoming_edges.index(edge_id), tuple(edge_lanes)))
+
+        # Per-lane CSV columns in sorted lane order, names formatted once
+        self._lane_cols = [(lane_id, f"{lane_id}_wait_s", f"{lane_id}_queue")
+                           for lane_id in sorted(self._lane_ids)]
+        self._fieldnames = list(_BASE_FIELDS)
+        for _lane_id, wait_col, queue_col in self._lane_cols:
+            self._fieldnames += (wait_col, queue_col)
+
+        traci.simulation.subscribe(_SIM_VARS)
 
+    def _collect_lane_metrics(self) -> dict[str, dict]:
+        """Read wait time, queue length, and vehicle count for all incoming lanes."""
+        res = traci.lane.getAllSubscriptionResults()
+        metrics: dict[str, dict] = {}
+        for lane_id in self._lane_ids:
+            r = res[lane_id]
+            metrics[lane_id] = {
+                "wait_time":    round(r[tc.VAR_WAITING_TIME], 2),
+                "queue_length": r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER],
+                "veh_count":    r[tc.LAST_STEP_VEHICLE_NUMBER],
+            }
         return metrics
 
     def _update_edge_stats(self, lane_metrics: dict[str, dict]) -> None:
         """Update running per-edge totals for use in summary_stats()."""
-        for edge in self.incoming_edges:
-            edge_lanes = {
-                k: v for k, v in lane_metrics.items()
-                if k.startswith(edge + "_")
-            }
-            if not edge_lanes:
-                continue
-
-            total_edge_wait = sum(m["wait_time"]    for m in edge_lanes.values())
-            max_edge_queue  = max(m["queue_length"] for m in edge_lanes.values())
-
-            stats = self.edge_stats[edge]
-            stats["total_wait"] += total_edge_wait
-            stats["max_queue"]   = max(stats["max_queue"], max_edge_queue)
-            stats["samples"]    += 1
+        # Lanes were grouped by edge once at subscribe time, so no per-step
+        # prefix filtering of lane IDs
+        for i, lanes in self._edge_lanes:
+            total_edge_wait = 0.0
+            max_edge_queue  = 0
+            for lane_id in lanes:
+                m = lane_metrics[lane_id]
+                total_edge_wait += m["wait_time"]
+                if m["queue_length"] > max_edge_queue:
+                    max_edge_queue = m["queue_length"]
+
+            self._edge_total_wait[i] += total_edge_wait
+            if max_edge_queue > self._edge_max_queue[i]:
+                self._edge_max_queue[i] = max_edge_queue
+            self._edge_samples[i] += 1
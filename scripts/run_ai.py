@@ -14,6 +14,7 @@ Usage:
 
 import os
 import sys
+import json
 import time
 import shutil
 import argparse
@@ -24,8 +25,22 @@ from pathlib import Path
 
 # -- SUMO / TraCI setup -------------------------------------------------------
 
+# SUMO_HOME found by an earlier run, so repeated invocations (sweeps) skip
+# the eclipse-sumo import and directory probing.  $SUMO_HOME still wins.
+_SUMO_HOME_CACHE = Path.home() / ".cache" / "atcs-gh" / "sumo_home"
+
+
 def _setup_sumo() -> str:
     home = os.environ.get("SUMO_HOME")
+    if home is None:
+        try:
+            cached = _SUMO_HOME_CACHE.read_text().strip()
+            if cached and os.path.isdir(cached):
+                home = cached
+                os.environ["SUMO_HOME"] = home
+        except OSError:
+            pass
+    probed = home is None
     if home is None:
         try:
             import sumo as _sp
@@ -45,6 +60,12 @@ def _setup_sumo() -> str:
     if home is None:
         print("[ERROR] SUMO not found. Install: pip install eclipse-sumo")
         sys.exit(1)
+    if probed:
+        try:
+            _SUMO_HOME_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            _SUMO_HOME_CACHE.write_text(home)
+        except OSError:
+            pass  # cache is best-effort
     tools = os.path.join(home, "tools")
     if tools not in sys.path:
         sys.path.insert(0, tools)
@@ -65,6 +86,11 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "ai"))
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
+# libsumo (the env's default backend) cannot drive sumo-gui — fall back to
+# the TraCI socket client when the GUI is requested.
+if "--gui" in sys.argv:
+    os.environ.setdefault("ATCS_LIBSUMO", "0")
+
 from dqn_agent     import DQNAgent
 from metrics_logger import MetricsLogger
 
@@ -79,6 +105,11 @@ from traffic_env import (
     MAX_QUEUE, MAX_QUEUE_LANE, MAX_SPEED, MAX_WAIT, MAX_PHASE_T,
     NUM_PHASES, WALKING_AREAS, MAX_PED_QUEUE,
 )
+# Drive SUMO through the same backend TrafficEnv selected (libsumo in-process
+# unless ATCS_LIBSUMO=0); MetricsLogger follows the same switch.
+from traffic_env import traci
+
+tc = traci.constants
 
 
 # -- Paths and constants ------------------------------------------------------
@@ -92,6 +123,7 @@ OUTPUT_CSV      = DATA_DIR / "ai_results.csv"
 
 SIM_DURATION    = 7200
 BASELINE_CSV    = DATA_DIR / "baseline_results.csv"
+BASELINE_CACHE  = DATA_DIR / "baseline_stats.json"
 
 
 def _load_baseline_stats() -> dict:
@@ -99,84 +131,181 @@ def _load_baseline_stats() -> dict:
     if not BASELINE_CSV.exists():
         print(f"[WARN] Baseline CSV not found ({BASELINE_CSV.name}), using fallback values.")
         return fallback
+
+    # The three summary values are cached next to the CSV, keyed by its
+    # mtime, so repeated runs skip re-parsing the whole baseline log
+    mtime_ns = BASELINE_CSV.stat().st_mtime_ns
+    try:
+        with open(BASELINE_CACHE, "r") as f:
+            cached = json.load(f)
+        if cached.get("mtime_ns") == mtime_ns:
+            return cached["stats"]
+    except (OSError, ValueError, KeyError):
+        pass
+
     try:
         import csv
-        with open(BASELINE_CSV, "r") as f:
-            reader = csv.DictReader(f)
-            rows = list(reader)
-        if not rows:
+        # One pass with running sums over plain rows (no per-row dict)
+        n, wait_sum, queue_peak, thrpt_sum = 0, 0.0, 0, 0.0
+        with open(BASELINE_CSV, "r", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return fallback
+            iw = header.index("avg_wait_time_s")
+            iq = header.index("total_queue_vehicles")
+            it = header.index("throughput_veh_per_min")
+            for row in reader:
+                wait_sum  += float(row[iw])
+                queue      = int(row[iq])
+                if queue > queue_peak:
+                    queue_peak = queue
+                thrpt_sum += float(row[it])
+                n += 1
+        if not n:
             return fallback
-        waits  = [float(r["avg_wait_time_s"]) for r in rows]
-        queues = [int(r["total_queue_vehicles"]) for r in rows]
-        thrpts = [float(r["throughput_veh_per_min"]) for r in rows]
-        return {
-            "avg_wait":       round(sum(waits) / len(waits), 2),
-            "peak_queue":     max(queues),
-            "avg_throughput":  round(sum(thrpts) / len(thrpts), 1),
+        stats = {
+            "avg_wait":       round(wait_sum / n, 2),
+            "peak_queue":     queue_peak,
+            "avg_throughput":  round(thrpt_sum / n, 1),
         }
     except Exception as e:
         print(f"[WARN] Could not parse baseline CSV: {e}. Using fallback values.")
         return fallback
 
+    try:
+        tmp = BASELINE_CACHE.with_suffix(".json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"mtime_ns": mtime_ns, "stats": stats}, f)
+        os.replace(tmp, BASELINE_CACHE)
+    except OSError:
+        pass  # cache is best-effort
+    return stats
+
 
 BASELINE = _load_baseline_stats()
 
 
-# -- Helper: build 42-dim state vector ----------------------------------------
+# -- TraCI subscriptions for the state vector ---------------------------------
 
-def build_state(phase: int,
-                phase_timer: int,
-                _in_yellow: bool) -> np.ndarray:
-    """Build the 42-dimensional normalised state vector from TraCI."""
-    # Per-lane features (7 lanes x 3 = 21 dims)
-    lane_queues = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_speeds = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-    lane_waits  = np.zeros(len(INCOMING_LANES), dtype=np.float32)
-
-    for i, lane_id in enumerate(INCOMING_LANES):
+_LANE_VARS = (tc.LAST_STEP_VEHICLE_HALTING_NUMBER,
+              tc.LAST_STEP_MEAN_SPEED,
+              tc.VAR_WAITING_TIME)
+_WALK_VARS = (tc.LAST_STEP_PERSON_ID_LIST,)
+_SIM_VARS  = (tc.VAR_MIN_EXPECTED_VEHICLES,)
+
+# Filled by _subscribe_state() with what the network actually has
+_STATE_LANES: list[tuple[int, str]] = []         # (index, lane) in INCOMING_LANES
+_EDGE_LANES:  list[tuple[str, ...]] = []         # vehicle lanes (no sidewalk), INCOMING_EDGES order
+_WALK_IDX:    list[tuple[int, str]] = []         # (index, walking area)
+
+
+def _subscribe_state() -> None:
+    """
+    Subscribe to every value build_state reads.
+
+    SUMO then pushes them back with each simulationStep, so build_state does
+    one bulk read per decision instead of a getter round-trip per lane and
+    variable.  Lanes / walking areas the network lacks are skipped here once
+    (their state entries stay zero, as before).
+    """
+    edge_lanes = {}
+    for edge in INCOMING_EDGES:
         try:
-            lane_queues[i] = float(traci.lane.getLastStepHaltingNumber(lane_id))
-            lane_speeds[i] = float(traci.lane.getLastStepMeanSpeed(lane_id))
-            lane_waits[i]  = float(traci.lane.getWaitingTime(lane_id))
+            n_lanes = traci.edge.getLaneNumber(edge)
         except traci.exceptions.TraCIException:
-            pass
+            n_lanes = 0
+        edge_lanes[edge] = [f"{edge}_{idx}" for idx in range(1, n_lanes)]  # lane 0 is sidewalk
 
-    # Per-approach queues (4 dims) — skip lane 0 (sidewalk)
-    approach_queues = np.zeros(len(INCOMING_EDGES), dtype=np.float32)
-    for i, edge in enumerate(INCOMING_EDGES):
+    subscribed = set()
+    for lane_id in set(INCOMING_LANES).union(*edge_lanes.values()):
         try:
-            n_lanes = traci.edge.getLaneNumber(edge)
-            total_q = 0
-            for idx in range(1, n_lanes):  # start at 1: lane 0 is sidewalk
-                total_q += traci.lane.getLastStepHaltingNumber(f"{edge}_{idx}")
-            approach_queues[i] = float(total_q)
+            traci.lane.subscribe(lane_id, _LANE_VARS)
+            subscribed.add(lane_id)
         except traci.exceptions.TraCIException:
             pass
 
-    # Phase one-hot (8 dims)
-    phase_vec = np.zeros(NUM_PHASES, dtype=np.float32)
-    phase_vec[phase] = 1.0
-
-    t_norm = np.float32(min(phase_timer / MAX_PHASE_T, 1.0))
+    _STATE_LANES[:] = [(i, l) for i, l in enumerate(INCOMING_LANES) if l in subscribed]
+    _EDGE_LANES[:] = [tuple(l for l in edge_lanes[edge] if l in subscribed)
+                      for edge in INCOMING_EDGES]
 
-    # Pedestrian waiting counts (4 dims)
-    ped_counts = np.zeros(len(WALKING_AREAS), dtype=np.float32)
+    _WALK_IDX.clear()
     for i, wa in enumerate(WALKING_AREAS):
         try:
-            ped_counts[i] = float(len(traci.edge.getLastStepPersonIDs(wa)))
+            traci.edge.subscribe(wa, _WALK_VARS)
+            _WALK_IDX.append((i, wa))
         except traci.exceptions.TraCIException:
             pass
 
-    state = np.concatenate([
-        lane_queues / MAX_QUEUE_LANE,   # 8 per-lane queues
-        lane_speeds / MAX_SPEED,         # 8 per-lane speeds
-        lane_waits  / MAX_WAIT,          # 8 per-lane waits
-        approach_queues / MAX_QUEUE,     # 4 approach queue totals
-        phase_vec,                       # 8 phase one-hot
-        [t_norm],                        # 1 phase timer
-        ped_counts / MAX_PED_QUEUE,      # 4 pedestrian waits
-    ])                                   # = 41
-    return state.astype(np.float32)
+    # End-of-demand check in the step loop (merges with MetricsLogger's
+    # simulation subscription rather than replacing it)
+    traci.simulation.subscribe(_SIM_VARS)
+
+
+# -- Helper: build 42-dim state vector ----------------------------------------
+
+_N_LANES = len(INCOMING_LANES)
+_N_EDGES = len(INCOMING_EDGES)
+
+# Normalisation as reciprocal multiplies, matching TrafficEnv._build_state
+_INV_MAX_QUEUE_LANE = np.float32(1.0 / MAX_QUEUE_LANE)
+_INV_MAX_SPEED      = np.float32(1.0 / MAX_SPEED)
+_INV_MAX_WAIT       = np.float32(1.0 / MAX_WAIT)
+_INV_MAX_QUEUE      = np.float32(1.0 / MAX_QUEUE)
+_INV_MAX_PHASE_T    = 1.0 / MAX_PHASE_T
+_INV_MAX_PED_QUEUE  = np.float32(1.0 / MAX_PED_QUEUE)
+
+
+def build_state(phase: int,
+                phase_timer: int,
+                _in_yellow: bool,
+                out: np.ndarray) -> np.ndarray:
+    """
+    Build the 41-dimensional normalised state vector from TraCI.
+
+    Written in place into ``out`` (a float32 buffer of STATE_SIZE owned by
+    the caller), so no per-decision arrays, concatenate or astype copy.
+    """
+    lane_res = traci.lane.getAllSubscriptionResults()
+
+    # Per-lane features (8 lanes x 3 = 24 dims)
+    q, sp, w = 0, _N_LANES, 2 * _N_LANES          # block offsets
+    out[:3 * _N_LANES] = 0.0
+    for i, lane_id in _STATE_LANES:
+        r = lane_res[lane_id]
+        out[q + i]  = r[tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+        out[sp + i] = r[tc.LAST_STEP_MEAN_SPEED]
+        out[w + i]  = r[tc.VAR_WAITING_TIME]
+    out[q:sp] *= _INV_MAX_QUEUE_LANE
+    out[sp:w] *= _INV_MAX_SPEED
+    out[w:3 * _N_LANES] *= _INV_MAX_WAIT
+
+    # Per-approach queues (4 dims) — skip lane 0 (sidewalk)
+    a = 3 * _N_LANES
+    i = a
+    for lanes in _EDGE_LANES:
+        total_q = 0
+        for lane_id in lanes:
+            total_q += lane_res[lane_id][tc.LAST_STEP_VEHICLE_HALTING_NUMBER]
+        out[i] = total_q
+        i += 1
+    out[a:a + _N_EDGES] *= _INV_MAX_QUEUE
+
+    # Phase one-hot (8 dims) + phase timer (1 dim)
+    ph = a + _N_EDGES
+    out[ph:ph + NUM_PHASES] = 0.0
+    out[ph + phase] = 1.0
+    out[ph + NUM_PHASES] = min(phase_timer * _INV_MAX_PHASE_T, 1.0)
+
+    # Pedestrian waiting counts (4 dims)
+    pd = ph + NUM_PHASES + 1
+    out[pd:] = 0.0
+    if _WALK_IDX:
+        edge_res = traci.edge.getAllSubscriptionResults()
+        for i, wa in _WALK_IDX:
+            out[pd + i] = len(edge_res[wa][tc.LAST_STEP_PERSON_ID_LIST])
+        out[pd:] *= _INV_MAX_PED_QUEUE
+    return out
 
 
 # -- Binary detection ----------------------------------------------------------
@@ -195,6 +324,10 @@ def find_sumo_binary(gui: bool = False) -> str:
 
 # -- Phase control helpers ----------------------------------------------------
 
+# CSV phase label per phase index (indexed every step, so no dict lookup)
+_PHASE_NAME_LUT = tuple(PHASE_NAMES.get(i, f"phase_{i}") for i in range(NUM_PHASES))
+
+
 def _can_switch(phase: int, phase_timer: int, in_yellow: bool) -> bool:
     if in_yellow or phase not in GREEN_PHASES:
         return False
@@ -214,7 +347,8 @@ def _get_yellow_for_phase(phase: int) -> int:
 
 def run_ai(model_path: str | Path = DEFAULT_MODEL,
            gui: bool = False,
-           route_file: str | None = None) -> None:
+           route_file: str | None = None,
+           int8: bool = False) -> None:
     """Run a single 2-hour episode with the trained DQN agent."""
     model_path = Path(model_path)
     DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -229,7 +363,10 @@ def run_ai(model_path: str | Path = DEFAULT_MODEL,
 
     agent = DQNAgent(state_size=STATE_SIZE, action_size=ACTION_SIZE)
     agent.load(model_path)
-    agent.set_eval_mode()
+    agent.set_eval_mode(quantize=int8)
+    # One throwaway forward pass so a compiled policy (CUDA) is traced here,
+    # not on the first decision inside the timed loop
+    agent.greedy_action(np.zeros(STATE_SIZE, dtype=np.float32))
 
     print("\n" + "=" * 62)
     print("  ATCS-GH -- AI Inference Run (Achimota/Neoplan Junction)")
@@ -254,6 +391,7 @@ def run_ai(model_path: str | Path = DEFAULT_MODEL,
     print("\n[TraCI] Connected")
 
     _install_ai_tl_program()
+    _subscribe_state()
 
     # Phase control state
     phase         = NS_THROUGH
@@ -263,9 +401,13 @@ def run_ai(model_path: str | Path = DEFAULT_MODEL,
     next_green    = EW_THROUGH
 
     steps_in_block = 0
+    state_buf  = np.empty(STATE_SIZE, dtype=np.float32)
     logger     = MetricsLogger(output_path=OUTPUT_CSV)
     wall_start = time.time()
-    last_pct   = -1
+    # Progress lines every 10%, at steps fixed up front so the loop only
+    # does one integer compare per step
+    progress   = iter([(max(1, SIM_DURATION * p // 100), p) for p in range(0, 101, 10)])
+    next_progress, pct = next(progress)
     step_num   = 0
 
     print(f"\n[SIM] Running {SIM_DURATION} steps... (Ctrl+C to abort)\n")
@@ -275,7 +417,7 @@ def run_ai(model_path: str | Path = DEFAULT_MODEL,
 
             # -- Agent decision (every DECISION_INTERVAL seconds) ------
             if steps_in_block == 0:
-                state = build_state(phase, phase_timer, in_yellow)
+                state = build_state(phase, phase_timer, in_yellow, state_buf)
                 action = agent.select_action(state)
 
                 if action != ACTION_HOLD and _can_switch(phase, phase_timer, in_yellow):
@@ -304,18 +446,17 @@ def run_ai(model_path: str | Path = DEFAULT_MODEL,
             phase_timer    += 1
             steps_in_block  = (steps_in_block + 1) % DECISION_INTERVAL
 
-            phase_name = PHASE_NAMES.get(phase, f"phase_{phase}")
-            logger.step(current_time=float(step_num), tl_phase_name=phase_name)
+            logger.step(current_time=float(step_num),
+                        tl_phase_name=_PHASE_NAME_LUT[phase])
 
-            pct = int(step_num / SIM_DURATION * 100)
-            if pct % 10 == 0 and pct != last_pct:
+            if step_num == next_progress:
                 elapsed = time.time() - wall_start
                 print(f"  [{pct:3d}%] t={step_num:5d}s  "
                       f"completed={logger.total_arrived:5d}  "
                       f"wall={elapsed:5.1f}s")
-                last_pct = pct
+                next_progress, pct = next(progress, (0, 0))
 
-            if traci.simulation.getMinExpectedNumber() == 0:
+            if traci.simulation.getSubscriptionResults()[tc.VAR_MIN_EXPECTED_VEHICLES] == 0:
                 print(f"\n[SIM] All vehicles done at t={step_num}s.")
                 break
 
@@ -417,8 +558,14 @@ if __name__ == "__main__":
         "--scenario", type=str, default=None,
         help="Demand scenario name (e.g. evening_rush). Uses default routes if not set."
     )
+    parser.add_argument(
+        "--int8", action="store_true",
+        help="Select actions with an INT8-quantized policy (CPU; falls back to fp32 "
+             "if its greedy actions differ)"
+    )
     args = parser.parse_args()
     route_file = None
     if args.scenario:
         route_file = str(SIM_DIR / "scenarios" / f"{args.scenario}.rou.xml")
-    run_ai(model_path=args.model, gui=args.gui, route_file=route_file)
+    run_ai(model_path=args.model, gui=args.gui, route_file=route_file,
+           int8=args.int8)
@@ -29,11 +29,17 @@ import time
 import shutil
 import argparse
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 
 # ── SUMO / TraCI Setup ────────────────────────────────────────────────────────
 
+# SUMO_HOME found by an earlier run (shared with run_ai), so repeated
+# invocations skip the eclipse-sumo import and directory probing
+_SUMO_HOME_CACHE = Path.home() / ".cache" / "atcs-gh" / "sumo_home"
+
+
 def setup_sumo() -> str:
     """
     Locate SUMO_HOME, add TraCI tools to sys.path, and return the SUMO home dir.
@@ -41,6 +47,16 @@ def setup_sumo() -> str:
     """
     sumo_home = os.environ.get("SUMO_HOME")
 
+    if sumo_home is None:
+        try:
+            cached = _SUMO_HOME_CACHE.read_text().strip()
+            if cached and os.path.isdir(cached):
+                sumo_home = cached
+                os.environ["SUMO_HOME"] = cached
+        except OSError:
+            pass
+    probed = sumo_home is None
+
     if sumo_home is None:
         # Check pip-installed eclipse-sumo package first (most reliable on modern macOS)
         try:
@@ -76,6 +92,13 @@ def setup_sumo() -> str:
         print("           Run scripts/build_network.py first.")
         sys.exit(1)
 
+    if probed:
+        try:
+            _SUMO_HOME_CACHE.parent.mkdir(parents=True, exist_ok=True)
+            _SUMO_HOME_CACHE.write_text(sumo_home)
+        except OSError:
+            pass  # cache is best-effort
+
     tools = os.path.join(sumo_home, "tools")
     if tools not in sys.path:
         sys.path.insert(0, tools)
@@ -93,6 +116,19 @@ except ImportError as e:
     print(f"  Check that {SUMO_HOME}/tools/ exists and contains traci/")
     sys.exit(1)
 
+# libsumo runs SUMO in-process (no socket round-trip per call) and is the
+# project default, matching ai/traffic_env and MetricsLogger; it cannot drive
+# sumo-gui, so --gui (or ATCS_LIBSUMO=0) keeps the TraCI socket client.
+if "--gui" in sys.argv:
+    os.environ.setdefault("ATCS_LIBSUMO", "0")
+if os.environ.get("ATCS_LIBSUMO", "1") == "1":
+    try:
+        import libsumo as traci
+    except ImportError:
+        pass
+
+tc = traci.constants
+
 # Import our metrics logger (sibling module)
 sys.path.insert(0, str(Path(__file__).parent))
 from metrics_logger import MetricsLogger
@@ -133,6 +169,10 @@ TIMER_PRESETS = {
                   "label": "protected-left 4-phase (NS 40/15, EW 25/10)"},
 }
 
+# TraCI variables subscribed for the step loop (time, end-of-demand, TL phase)
+_SIM_VARS = (tc.VAR_TIME, tc.VAR_MIN_EXPECTED_VEHICLES)
+_TL_VARS  = (tc.TL_CURRENT_PHASE,)
+
 # Human-readable phase names indexed by SUMO phase index (0–3)
 PHASE_NAMES = {0: "NS_GREEN", 1: "NS_YELLOW", 2: "EW_GREEN", 3: "EW_YELLOW"}
 
@@ -168,6 +208,7 @@ BASELINE_SIGNALS = {
 
 # ── SUMO Binary Detection ─────────────────────────────────────────────────────
 
+@lru_cache(maxsize=None)
 def find_sumo_binary(gui: bool = False) -> str:
     """Return path to 'sumo' or 'sumo-gui' binary."""
     name = "sumo-gui" if gui else "sumo"
@@ -259,7 +300,7 @@ def configure_fixed_timer(tl_id: str,
 
     cycle = sum(p.duration for p in new_phases)
     print(f"[TL]  Fixed timer '{program_label}' set on junction '{tl_id}' "
-          f"({len(new_phases)} phases, {cycle}s cycle)")
+          f"({len(new_phases)} phases, {cycle:g}s cycle)")
     for i, (name, _dur, _state) in enumerate(phase_plan):
         p = new_phases[i]
         print(f"      Phase {i} ({name:12s}): {p.duration:3.0f}s  state={p.state}")
@@ -271,7 +312,7 @@ def configure_fixed_timer(tl_id: str,
 
 def run_simulation(gui: bool = False,
                    preset: str = "naive",
-                   route_file: str | None = None) -> tuple[list[dict], dict]:
+                   route_file: str | None = None) -> dict:
     """
     Main simulation loop.
 
@@ -283,7 +324,7 @@ def run_simulation(gui: bool = False,
         preset: Timer preset name — "naive" (45/45) or "tuned" (55/35).
 
     Returns:
-        records list
+        MetricsLogger.summary_stats() for the run
     """
     timer = TIMER_PRESETS[preset]
     ns_green = timer["ns_green"]
@@ -345,39 +386,59 @@ def run_simulation(gui: bool = False,
         ew_left=timer.get("ew_left"),
     )
 
+    # Per-step readings arrive with each simulationStep instead of three
+    # getter round-trips (merges with MetricsLogger's own subscriptions)
+    traci.simulation.subscribe(_SIM_VARS)
+    traci.trafficlight.subscribe(TL_ID, _TL_VARS)
+
     # Initialise metrics logger
     logger = MetricsLogger(output_path=output_csv)
 
-    wall_start   = time.time()
-    last_pct     = -1
+    # Human-readable name per phase index of the installed program, so the
+    # loop indexes a tuple instead of a dict .get() with an f-string fallback
+    phase_names = tuple(PHASE_NAMES.get(i, f"phase_{i}")
+                        for i in range(len(configured_phases)))
+
+    # Progress lines every 10%, at steps fixed up front
+    progress = iter([(max(1, SIM_DURATION * p // 100), p) for p in range(0, 101, 10)])
+    next_progress, pct = next(progress)
+
+    # Loop-invariant lookups bound once
+    sim_step    = traci.simulationStep
+    sim_results = traci.simulation.getSubscriptionResults
+    tl_results  = traci.trafficlight.getSubscriptionResults
+    logger_step = logger.step
+    VAR_TIME, VAR_MIN_EXPECTED = tc.VAR_TIME, tc.VAR_MIN_EXPECTED_VEHICLES
+    TL_CURRENT_PHASE = tc.TL_CURRENT_PHASE
+
+    wall_start   = time.perf_counter()
 
     print(f"\n[SIM] Running {SIM_DURATION} steps... (Ctrl+C to abort)\n")
 
     try:
         for step_num in range(1, SIM_DURATION + 1):
-            traci.simulationStep()
+            sim_step()
 
-            current_time = traci.simulation.getTime()
+            sim_res      = sim_results()
+            current_time = sim_res[VAR_TIME]
 
             # Determine human-readable phase name
-            raw_phase    = traci.trafficlight.getPhase(TL_ID)
-            phase_name   = PHASE_NAMES.get(raw_phase, f"phase_{raw_phase}")
+            phase_name   = phase_names[tl_results(TL_ID)[TL_CURRENT_PHASE]]
 
             # Collect and store metrics for this step
-            logger.step(current_time=current_time, tl_phase_name=phase_name)
+            logger_step(current_time=current_time, tl_phase_name=phase_name)
 
             # Progress indicator every 10%
-            pct = int(step_num / SIM_DURATION * 100)
-            if pct % 10 == 0 and pct != last_pct:
-                elapsed = time.time() - wall_start
+            if step_num == next_progress:
+                elapsed = time.perf_counter() - wall_start
                 completed = logger.total_arrived
                 print(f"  [{pct:3d}%] t={step_num:5d}s  "
                       f"completed={completed:5d}  "
                       f"wall={elapsed:5.1f}s")
-                last_pct = pct
+                next_progress, pct = next(progress, (0, 0))
 
             # Early exit if all vehicles have finished (saves time on light traffic)
-            if traci.simulation.getMinExpectedNumber() == 0:
+            if sim_res[VAR_MIN_EXPECTED] == 0:
                 print(f"\n[SIM] All vehicles completed at t={step_num}s — stopping early.")
                 break
 
@@ -386,7 +447,7 @@ def run_simulation(gui: bool = False,
 
     finally:
         traci.close()
-        total_wall = time.time() - wall_start
+        total_wall = time.perf_counter() - wall_start
         print(f"[TraCI] Disconnected. Wall-clock time: {total_wall:.1f}s")
 
     # Save CSV results
@@ -395,7 +456,7 @@ def run_simulation(gui: bool = False,
     # Print summary report
     stats = logger.summary_stats()
     print_report(
-        sim_time      = int(traci.simulation.getTime()) if False else step_num,
+        sim_time      = step_num,
         stats         = stats,
         preset        = preset,
         ns_green      = ns_green,
@@ -403,7 +464,7 @@ def run_simulation(gui: bool = False,
         output_csv    = output_csv,
     )
 
-    return logger.records
+    return stats
 
 
 # ── Terminal Report ───────────────────────────────────────────────────────────
@@ -432,39 +493,43 @@ def print_report(sim_time: int, stats: dict, *,
     ai_target   = round(avg_wait * 0.60, 2)   # Phase 2 target: 40% reduction
     cycle       = ns_green + YELLOW_DURATION + ew_green + YELLOW_DURATION
 
-    print("\n" + "═" * 62)
-    print(f"  ATCS-GH  |  BASELINE REPORT ({preset.upper()})  |  Phase 1")
-    print("═" * 62)
-    print(f"  Generated : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"  Simulated : {sim_time}s  ({sim_time / 3600:.2f} hours)")
-    print(f"  TL Timer  : {ns_green}s NS-green / {YELLOW_DURATION}s yellow "
-          f"/ {ew_green}s EW-green  ({cycle}s cycle)")
-    print()
-    print(f"  ┌── OVERALL PERFORMANCE ────────────────────────────┐")
-    print(f"  │  Vehicles completed journey  : {stats['total_completed']:>8,}           │")
-    print(f"  │  Average wait time (all lanes): {avg_wait:>7.2f}s           │")
-    print(f"  │  Peak queue length            : {stats['peak_queue']:>8} vehicles      │")
-    print(f"  │  Average throughput           : {stats['avg_throughput']:>7.1f} veh/min       │")
-    print(f"  │  Peak throughput              : {stats['peak_throughput']:>7.0f} veh/min       │")
-    print(f"  └───────────────────────────────────────────────────┘")
-    print()
-
-    print(f"  ┌── LANE PERFORMANCE ───────────────────────────────┐")
-    print(f"  │  {'Approach':<30}  {'Avg Wait':>8}  {'Max Queue':>9}  │")
-    print(f"  │  {'─'*30}  {'─'*8}  {'─'*9}  │")
+    lines = [
+        "\n" + "═" * 62,
+        f"  ATCS-GH  |  BASELINE REPORT ({preset.upper()})  |  Phase 1",
+        "═" * 62,
+        f"  Generated : {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        f"  Simulated : {sim_time}s  ({sim_time / 3600:.2f} hours)",
+        f"  TL Timer  : {ns_green}s NS-green / {YELLOW_DURATION}s yellow "
+        f"/ {ew_green}s EW-green  ({cycle}s cycle)",
+        "",
+        f"  ┌── OVERALL PERFORMANCE ────────────────────────────┐",
+        f"  │  Vehicles completed journey  : {stats['total_completed']:>8,}           │",
+        f"  │  Average wait time (all lanes): {avg_wait:>7.2f}s           │",
+        f"  │  Peak queue length            : {stats['peak_queue']:>8} vehicles      │",
+        f"  │  Average throughput           : {stats['avg_throughput']:>7.1f} veh/min       │",
+        f"  │  Peak throughput              : {stats['peak_throughput']:>7.0f} veh/min       │",
+        f"  └───────────────────────────────────────────────────┘",
+        "",
+        f"  ┌── LANE PERFORMANCE ───────────────────────────────┐",
+        f"  │  {'Approach':<30}  {'Avg Wait':>8}  {'Max Queue':>9}  │",
+        f"  │  {'─'*30}  {'─'*8}  {'─'*9}  │",
+    ]
     for edge, label in edge_labels.items():
         es = stats["edge_stats"].get(edge, {})
         samples = es.get("samples", 0)
         avg_w   = round(es["total_wait"] / samples, 2) if samples > 0 else 0.0
         max_q   = es.get("max_queue", 0)
-        print(f"  │  {label:<30}  {avg_w:>7.2f}s  {max_q:>9}  │")
-    print(f"  └───────────────────────────────────────────────────┘")
-    print()
-
-    print(f"  ── Phase 2 Target ─────────────────────────────────────")
-    print(f"     Avg wait: {avg_wait:.2f}s  →  target < {ai_target:.2f}s  (40% reduction)")
-    print(f"     Results saved to: {output_csv.relative_to(PROJECT_ROOT)}")
-    print("═" * 62 + "\n")
+        lines.append(f"  │  {label:<30}  {avg_w:>7.2f}s  {max_q:>9}  │")
+    lines += [
+        f"  └───────────────────────────────────────────────────┘",
+        "",
+        f"  ── Phase 2 Target ─────────────────────────────────────",
+        f"     Avg wait: {avg_wait:.2f}s  →  target < {ai_target:.2f}s  (40% reduction)",
+        f"     Results saved to: {output_csv.relative_to(PROJECT_ROOT)}",
+        "═" * 62 + "\n",
+    ]
+    # Built up front and written once, rather than ~25 separate prints
+    print("\n".join(lines))
 
 
 # ── Entry Point ───────────────────────────────────────────────────────────────
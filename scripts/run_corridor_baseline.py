@@ -42,6 +42,8 @@ SUMO_HOME = _bootstrap_sumo()
 import traci
 import traci.exceptions
 
+tc = traci.constants
+
 SIM_DIR     = PROJECT_ROOT / "simulation"
 CONFIG_FILE = SIM_DIR / "corridor.sumocfg"
 LOG_DIR     = PROJECT_ROOT / "logs"
@@ -142,6 +144,10 @@ def run_baseline(gui: bool = False, offset: float = 0.0,
     total_arrived = 0
     wait_samples = {jid: [] for jid in JUNCTION_IDS}
     queue_samples = {jid: [] for jid in JUNCTION_IDS}
+    # Arrived / still-expected counts come back with each step (one
+    # subscription read instead of two getter calls per step)
+    traci.simulation.subscribe((tc.VAR_ARRIVED_VEHICLES_NUMBER,
+                                tc.VAR_MIN_EXPECTED_VEHICLES))
 
     for sim_step in range(1, SIM_DURATION + 1):
         # Update TL timing for each junction
@@ -149,7 +155,8 @@ def run_baseline(gui: bool = False, offset: float = 0.0,
             tls.update()
 
         traci.simulationStep()
-        total_arrived += traci.simulation.getArrivedNumber()
+        sim_res = traci.simulation.getSubscriptionResults()
+        total_arrived += sim_res[tc.VAR_ARRIVED_VEHICLES_NUMBER]
 
         # Sample metrics every DECISION_INTERVAL
         if sim_step % DECISION_INTERVAL == 0:
@@ -169,7 +176,7 @@ def run_baseline(gui: bool = False, offset: float = 0.0,
                 queue_samples[jid].append(total_q)
                 wait_samples[jid].append(total_w / max(n_edges, 1))
 
-        if traci.simulation.getMinExpectedNumber() == 0:
+        if sim_res[tc.VAR_MIN_EXPECTED_VEHICLES] == 0:
             break
 
     traci.close()
@@ -24,11 +24,13 @@ Outputs:
     data/training_log.csv     — per-episode metrics
 """
 
+import os
 import sys
 import csv
 import time
 import random
 import argparse
+import numpy as np
 from pathlib import Path
 from datetime import datetime
 
@@ -37,7 +39,12 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(PROJECT_ROOT / "ai"))
 sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
 
-from traffic_env import TrafficEnv, STATE_SIZE, ACTION_SIZE
+# libsumo (the env's default backend) cannot drive sumo-gui — fall back to
+# the TraCI socket client when the GUI is requested.
+if "--gui" in sys.argv:
+    os.environ.setdefault("ATCS_LIBSUMO", "0")
+
+from traffic_env import TrafficEnv, ParallelTrafficEnv, STATE_SIZE, ACTION_SIZE
 from dqn_agent   import DQNAgent
 
 # ── Training configuration ────────────────────────────────────────────────────
@@ -48,6 +55,10 @@ CHECKPOINT_DIR    = PROJECT_ROOT / "ai"    / "checkpoints"
 BEST_MODEL_PATH   = PROJECT_ROOT / "ai"    / "best_model.pth"
 FINAL_MODEL_PATH  = PROJECT_ROOT / "ai"    / "trained_model.pth"
 
+# training_log.csv columns, in the order each episode row is built
+_LOG_FIELDS = ("episode", "scenario", "total_reward", "avg_wait_s", "peak_queue",
+               "epsilon", "mean_loss", "delta_vs_baseline_pct", "episode_time_s")
+
 # ── Multi-scenario training ──────────────────────────────────────────────────
 SCENARIO_DIR = PROJECT_ROOT / "simulation" / "scenarios"
 # v2/v4 (2026-06-13): the continuous DAY is the centerpiece — quiet → morning
@@ -76,11 +87,11 @@ def _load_baseline_avg_wait() -> float:
         print(f"[WARN] Baseline CSV not found, using fallback value 399.12s.")
         return 399.12
     try:
-        import csv
+        # One C-level numeric read of just the wait column (no per-row dicts)
         with open(BASELINE_CSV, "r") as f:
-            reader = csv.DictReader(f)
-            waits = [float(r["avg_wait_time_s"]) for r in reader]
-        return round(sum(waits) / len(waits), 2) if waits else 399.12
+            col = f.readline().rstrip("\r\n").split(",").index("avg_wait_time_s")
+            waits = np.loadtxt(f, delimiter=",", usecols=col, ndmin=1)
+        return round(float(waits.mean()), 2) if waits.size else 399.12
     except Exception as e:
         print(f"[WARN] Could not parse baseline CSV: {e}. Using fallback 399.12s.")
         return 399.12
@@ -142,7 +153,9 @@ EXPERT_FRAC = 0.70
 
 def train(n_episodes:   int  = DEFAULT_EPISODES,
           resume_from:  str  | None = None,
-          gui:          bool = False) -> None:
+          gui:          bool = False,
+          workers:      int  = 1,
+          learn_every:  int  = 1) -> None:
     """
     Main training loop.
 
@@ -150,12 +163,27 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
         n_episodes:  Number of episodes to train.
         resume_from: Optional checkpoint path to resume from.
         gui:         If True, launch SUMO-GUI (very slow — debugging only).
+        workers:     Episodes simulated concurrently, each in its own worker
+                     process / SUMO (ParallelTrafficEnv).  The main process
+                     keeps the single agent, replay buffer and all logging.
+        learn_every: Gradient update every N transitions instead of every one,
+                     on an N× larger batch (same samples per transition, N×
+                     fewer optimizer steps / kernel launches).
     """
+    if workers > 1 and gui:
+        print("[TRAIN] --gui needs a single SUMO — ignoring --workers")
+        workers = 1
     CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
     LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
 
     # ── Initialise agent ─────────────────────────────────────────────────────
     agent = DQNAgent(state_size=STATE_SIZE, action_size=ACTION_SIZE)
+    learn_every = max(1, learn_every)
+    if learn_every > 1:
+        # Keep the replay ratio and target-tracking speed per transition: the
+        # batch grows with the update interval and the Polyak rate compounds
+        agent.BATCH_SIZE = DQNAgent.BATCH_SIZE * learn_every
+        agent.TAU        = 1.0 - (1.0 - DQNAgent.TAU) ** learn_every
 
     start_episode = 1
     if resume_from:
@@ -166,7 +194,12 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
     # ── Multi-scenario rotation ─────────────────────────────────────────────
     n_scenarios = len(SCENARIOS)
 
-    log_rows:       list[dict] = []
+    # Per-episode results for the end-of-run summary, kept columnar in
+    # completion order (the CSV row dict is only built for the log file)
+    ep_waits = np.empty(n_episodes, dtype=np.float64)
+    ep_scens = np.empty(n_episodes, dtype=np.int16)   # code into scen_codes
+    scen_codes: dict[str, int] = {}                   # scenario name → code, first-seen order
+    n_done   = 0
     # "Best model" selection — worst-case-aware (maximin), not single-episode.
     # FIX (2026-06-07): the old code saved best_model.pth whenever ANY single
     # episode beat the running best avg_wait. With a 5-scenario rotation that
@@ -185,18 +218,19 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
     recent_rel:     list[tuple[str, float]] = []     # (scenario, wait / baseline)
     best_score:     tuple[float, float] = (float("inf"), float("inf"))  # (worst, mean)
     training_start: float      = time.time()
-    _csv_header_written: bool  = False      # track incremental CSV state
 
     print("\n" + "═" * 72)
     print("  ATCS-GH Phase 2 — DQN Multi-Scenario Training")
     print("═" * 72)
     print(f"  Device       : {agent.device}")
-    print(f"  Episodes     : {n_episodes}")
+    print(f"  Episodes     : {n_episodes}"
+          + (f"  ({workers} concurrent workers)" if workers > 1 else ""))
     print(f"  Scenarios    : {n_scenarios} (rotating each episode)")
     for s in SCENARIOS:
         print(f"                 • {s.stem}")
     print(f"  State size   : {STATE_SIZE}  |  Action size: {ACTION_SIZE}")
-    print(f"  Batch size   : {DQNAgent.BATCH_SIZE}  |  Buffer: {DQNAgent.BUFFER_SIZE:,}")
+    print(f"  Batch size   : {agent.BATCH_SIZE}  |  Buffer: {DQNAgent.BUFFER_SIZE:,}"
+          + (f"  |  learn every {learn_every} steps" if learn_every > 1 else ""))
     print(f"  ε start/min  : {DQNAgent.EPSILON_START} → {DQNAgent.EPSILON_MIN}")
     if SCENARIO_BASELINES:
         print(f"  Grading      : per-scenario fixed-timer baselines "
@@ -214,47 +248,22 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
           f"{'ε':>6}  {'Δ Baseline':>11}  {'Time':>6}  Note")
     print("  " + "─" * 88)
 
-    for episode in range(start_episode, start_episode + n_episodes):
-        ep_start = time.time()
-
-        # Rotate through scenarios so agent sees all demand patterns
-        scenario_path = SCENARIOS[(episode - 1) % n_scenarios]
-        # .stem of "morning_rush.rou.xml" is "morning_rush.rou" (only the last
-        # suffix drops); strip ".rou" so it matches scenario_baselines.csv keys.
-        scenario_name = scenario_path.stem.replace(".rou", "")
-
-        # Create environment with this episode's scenario route file
-        env = TrafficEnv(gui=gui, verbose=False, route_file=str(scenario_path))
-
-        # Vary the SUMO seed each episode to prevent overfitting
-        seed  = episode * 137     # deterministic but varied per episode
-        state = env.reset(seed=seed)
-        done  = False
-
-        # ── Episode rollout ───────────────────────────────────────────────────
-        while not done:
-            # Guided ε-exploration: explore mostly via the sustained-green expert
-            # (warm-start) so heavy episodes keep flowing and the agent learns to
-            # HOLD greens; otherwise exploit the learned policy.
-            if random.random() < agent.epsilon:
-                action = (env.expert_action()
-                          if random.random() < EXPERT_FRAC
-                          else random.randrange(ACTION_SIZE))
-            else:
-                action = agent.greedy_action(state)
-            next_state, reward, done, info = env.step(action)
-            agent.remember(state, action, reward, next_state, done)
-            agent.learn()
-            state = next_state
-
-        env.close()
+    # Training log stays open for the whole run: one row per episode,
+    # flushed so the data survives a crash, without reopening the file
+    log_fh = open(LOG_FILE, "w", newline="")
+    log_writer = csv.DictWriter(log_fh, fieldnames=_LOG_FIELDS)
+    log_writer.writeheader()
+    log_fh.flush()
+
+    def finish_episode(episode: int, scenario_name: str, avg_wait: float,
+                       total_reward: float, peak_queue: int, ep_time: float) -> None:
+        """Decay ε, then best-model selection, checkpoint, log row and progress line."""
+        nonlocal best_score, n_done
         agent.decay_epsilon()
+        # Mean TD loss over the updates since the last finished episode
+        # (None until the buffer reaches MIN_BUFFER_SIZE)
+        mean_loss = agent.flush_loss()
 
-        # ── Collect episode stats ─────────────────────────────────────────────
-        avg_wait     = env.episode_avg_wait
-        total_reward = env.episode_total_reward
-        peak_queue   = env.episode_peak_queue
-        ep_time      = time.time() - ep_start
         scenario_baseline = SCENARIO_BASELINES.get(scenario_name, BASELINE_AVG_WAIT)
         delta_pct    = (avg_wait - scenario_baseline) / scenario_baseline * 100
 
@@ -293,22 +302,17 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
             "avg_wait_s":            round(avg_wait, 2),
             "peak_queue":            peak_queue,
             "epsilon":               round(agent.epsilon, 4),
+            "mean_loss":             None if mean_loss is None else round(mean_loss, 5),
             "delta_vs_baseline_pct": round(delta_pct, 1),
             "episode_time_s":        round(ep_time, 1),
         }
-        log_rows.append(row)
+        ep_waits[n_done] = row["avg_wait_s"]
+        ep_scens[n_done] = scen_codes.setdefault(scenario_name, len(scen_codes))
+        n_done += 1
 
         # Write CSV incrementally so data survives crashes
-        if not _csv_header_written:
-            with open(LOG_FILE, "w", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=list(row.keys()))
-                writer.writeheader()
-                writer.writerow(row)
-            _csv_header_written = True
-        else:
-            with open(LOG_FILE, "a", newline="") as f:
-                writer = csv.DictWriter(f, fieldnames=list(row.keys()))
-                writer.writerow(row)
+        log_writer.writerow(row)
+        log_fh.flush()
 
         # ── Progress line ─────────────────────────────────────────────────────
         direction = "▲" if delta_pct > 0 else "▼"
@@ -322,37 +326,172 @@ def train(n_episodes:   int  = DEFAULT_EPISODES,
               f"{ep_time:>5.0f}s  "
               f"{note}")
 
+    try:
+        if workers > 1:
+            _rollout_parallel(agent, workers, start_episode, n_episodes,
+                              learn_every, finish_episode)
+        else:
+            _rollout_serial(agent, gui, start_episode, n_episodes,
+                            learn_every, finish_episode)
+    finally:
+        log_fh.close()
+
     # ── Save final model and log ──────────────────────────────────────────────
     agent.save(FINAL_MODEL_PATH)
-    _save_log(log_rows)
+    print(f"\n[TRAIN] Training log saved → {LOG_FILE}")
 
     total_wall = time.time() - training_start
-    _print_summary(log_rows, best_score, total_wall)
+    _print_summary(ep_waits[:n_done], ep_scens[:n_done], list(scen_codes),
+                   best_score, total_wall)
 
 
-# ── Helpers ───────────────────────────────────────────────────────────────────
+# ── Rollouts ──────────────────────────────────────────────────────────────────
+
+def _scenario_for(episode: int) -> tuple[Path, str]:
+    """Rotate through scenarios so the agent sees all demand patterns."""
+    scenario_path = SCENARIOS[(episode - 1) % len(SCENARIOS)]
+    # .stem of "morning_rush.rou.xml" is "morning_rush.rou" (only the last
+    # suffix drops); strip ".rou" so it matches scenario_baselines.csv keys.
+    return scenario_path, scenario_path.stem.replace(".rou", "")
+
+
+def _explore(agent: DQNAgent, expert) -> int | None:
+    """
+    Guided ε-exploration: explore mostly via the sustained-green expert
+    (warm-start) so heavy episodes keep flowing and the agent learns to
+    HOLD greens.  Returns None when the learned policy should be exploited.
+    """
+    if random.random() < agent.epsilon:
+        return (expert()
+                if random.random() < EXPERT_FRAC
+                else random.randrange(ACTION_SIZE))
+    return None
 
-def _save_log(rows: list[dict]) -> None:
-    """Write per-episode training log to CSV."""
-    with open(LOG_FILE, "w", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"\n[TRAIN] Training log saved → {LOG_FILE}")
 
+def _explore_or_exploit(agent: DQNAgent, state: np.ndarray, expert) -> int:
+    """_explore, falling back to the greedy action for a single state."""
+    action = _explore(agent, expert)
+    return agent.greedy_action(state) if action is None else action
 
-def _print_summary(rows: list[dict],
+
+def _rollout_serial(agent: DQNAgent, gui: bool, start_episode: int,
+                    n_episodes: int, learn_every: int, finish_episode) -> None:
+    """One episode at a time on a fresh TrafficEnv."""
+    n_trans = 0
+    for episode in range(start_episode, start_episode + n_episodes):
+        ep_start = time.time()
+        scenario_path, scenario_name = _scenario_for(episode)
+
+        # Create environment with this episode's scenario route file
+        env = TrafficEnv(gui=gui, verbose=False, route_file=str(scenario_path))
+
+        # Vary the SUMO seed each episode to prevent overfitting
+        seed  = episode * 137     # deterministic but varied per episode
+        state = env.reset(seed=seed)
+        done  = False
+
+        # ── Episode rollout ───────────────────────────────────────────────────
+        while not done:
+            action = _explore_or_exploit(agent, state, env.expert_action)
+            next_state, reward, done, info = env.step(action)
+            agent.remember(state, action, reward, next_state, done)
+            n_trans += 1
+            if n_trans % learn_every == 0:
+                agent.learn()
+            state = next_state
+
+        env.close()
+        finish_episode(episode, scenario_name, env.episode_avg_wait,
+                       env.episode_total_reward, env.episode_peak_queue,
+                       time.time() - ep_start)
+
+
+def _rollout_parallel(agent: DQNAgent, workers: int, start_episode: int,
+                      n_episodes: int, learn_every: int, finish_episode) -> None:
+    """
+    Up to `workers` episodes in flight at once, one per ParallelTrafficEnv
+    worker.  Every decision step scores the exploiting workers' states in one
+    batched forward pass, then advances all live SUMOs concurrently; their
+    transitions go into the shared replay buffer and learn() runs every
+    `learn_every` of them, so the update-to-data ratio matches the serial loop.  A worker whose
+    episode ends is handed the next episode number straight away, and
+    episodes are finished (logged, ε decayed) in completion order.
+    """
+    venv     = ParallelTrafficEnv(workers)
+    pending  = iter(range(start_episode, start_episode + n_episodes))
+    states   = np.zeros((workers, STATE_SIZE), dtype=np.float32)
+    live: list[tuple[int, str, float] | None] = [None] * workers  # (episode, scenario, t0)
+    n_trans  = 0
+
+    def start_next(i: int) -> None:
+        episode = next(pending, None)
+        if episode is None:
+            live[i] = None
+            return
+        scenario_path, scenario_name = _scenario_for(episode)
+        states[i] = venv.reset_one(i, seed=episode * 137, route_file=str(scenario_path))
+        live[i] = (episode, scenario_name, time.time())
+
+    try:
+        for i in range(workers):
+            start_next(i)
+        actions = [0] * workers
+        while any(live):
+            active  = [slot is not None for slot in live]
+            exploit = []
+            for i in range(workers):
+                if active[i]:
+                    action = _explore(agent, lambda i=i: venv.expert_action(i))
+                    if action is None:
+                        exploit.append(i)
+                    else:
+                        actions[i] = action
+            # One batched forward for every worker that exploits this step
+            if exploit:
+                for i, action in zip(exploit, agent.greedy_actions(states[exploit])):
+                    actions[i] = int(action)
+            next_states, rewards, dones, infos = venv.step(actions, active)
+            for i in range(workers):
+                if not active[i]:
+                    continue
+                agent.remember(states[i], actions[i], rewards[i],
+                               next_states[i], dones[i])
+                n_trans += 1
+                if n_trans % learn_every == 0:
+                    agent.learn()
+                states[i] = next_states[i]
+                if dones[i]:
+                    episode, scenario_name, t0 = live[i]
+                    info = infos[i]
+                    finish_episode(episode, scenario_name, info["episode_avg_wait"],
+                                   info["episode_total_reward"],
+                                   info["episode_peak_queue"], time.time() - t0)
+                    start_next(i)
+    finally:
+        venv.close()
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _print_summary(waits: np.ndarray,
+                   scens: np.ndarray,
+                   scen_names: list[str],
                    best_score: tuple[float, float],
                    wall_seconds: float) -> None:
-    """Print a formatted summary after all episodes complete."""
-    n = len(rows)
+    """
+    Print a formatted summary after all episodes complete.
+
+    waits/scens hold each episode's avg wait and scenario code (an index
+    into scen_names), in the order the episodes finished.
+    """
+    n = len(waits)
     if n == 0:
         return
 
     n_first = min(5, n)
     n_last  = min(5, n)
-    first_avg = sum(r["avg_wait_s"] for r in rows[:n_first]) / n_first
-    last_avg  = sum(r["avg_wait_s"] for r in rows[-n_last:])  / n_last
+    first_avg = float(waits[:n_first].mean())
+    last_avg  = float(waits[-n_last:].mean())
     improvement = (first_avg - last_avg) / first_avg * 100 if first_avg > 0 else 0.0
     print("\n" + "═" * 62)
     print("  ATCS-GH — TRAINING COMPLETE")
@@ -376,20 +515,16 @@ def _print_summary(rows: list[dict],
               f"{MIN_SELECT_BASELINE_S:.0f}s) — maximin over rolling window")
     print()
     print(f"  Per-scenario — mean of last 3 episodes vs each scenario's naive timer:")
-    by_scen: dict[str, list[float]] = {}
-    for r in rows:
-        by_scen.setdefault(r["scenario"], []).append(r["avg_wait_s"])
     wins = 0
-    for scen, waits in by_scen.items():
-        last = waits[-3:] if len(waits) >= 3 else waits
-        ai   = sum(last) / len(last)
+    for k, scen in enumerate(scen_names):
+        ai   = float(waits[scens == k][-3:].mean())
         base = SCENARIO_BASELINES.get(scen, BASELINE_AVG_WAIT)
         d    = (ai - base) / base * 100
         beat = d < 0
         wins += int(beat)
         print(f"    {scen:>17}: AI {ai:>7.1f}s  vs timer {base:>7.1f}s  "
               f"{d:>+6.1f}%  {'✓ beats' if beat else '✗'}")
-    print(f"\n  AI beats the naive fixed timer on {wins}/{len(by_scen)} scenarios")
+    print(f"\n  AI beats the naive fixed timer on {wins}/{len(scen_names)} scenarios")
     print()
     print(f"  Saved models:")
     print(f"    Best  → {BEST_MODEL_PATH.relative_to(PROJECT_ROOT)}")
@@ -420,5 +555,14 @@ if __name__ == "__main__":
         "--gui", action="store_true",
         help="Run SUMO with GUI during training (very slow — for debugging only)"
     )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Episodes to simulate concurrently, one SUMO per worker process (default: 1)"
+    )
+    parser.add_argument(
+        "--learn-every", type=int, default=1, metavar="N",
+        help="One gradient update per N transitions on an N× batch (default: 1)"
+    )
     args = parser.parse_args()
-    train(n_episodes=args.episodes, resume_from=args.resume, gui=args.gui)
+    train(n_episodes=args.episodes, resume_from=args.resume, gui=args.gui,
+          workers=args.workers, learn_every=args.learn_every)
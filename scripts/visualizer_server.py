@@ -25,13 +25,20 @@ Usage:
 import os
 import sys
 import json
-import time
+import math
 import asyncio
 import argparse
 import random
 from pathlib import Path
 import numpy as np
 
+# orjson is optional: it encodes the per-second packets several times faster
+# than the stdlib and returns UTF-8 bytes that go out without re-encoding.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ── SUMO / TraCI bootstrapping ──────────────────────────────────────────────
 # (Same pattern as run_ai.py — locate SUMO and add TraCI tools to sys.path)
@@ -94,13 +101,37 @@ from traffic_env import (
     STATE_SIZE, ACTION_SIZE,
     DECISION_INTERVAL, MIN_GREEN_THROUGH, MIN_GREEN_LEFT, YELLOW_DURATION,
     MAX_QUEUE, MAX_WAIT, MAX_PHASE_T, SIM_DURATION,
-    CROSSING_EDGES, WALKING_AREAS,
+    CROSSING_EDGES,
     TrafficEnv,
 )
+# Query the simulation through the same backend (libsumo or socket TraCI)
+# that TrafficEnv connected with.
+from traffic_env import traci
+
+tc = traci.constants
 
 # Outgoing edges (junction -> direction)
 OUTGOING_EDGES = ["ACH_J2N", "ACH_J2S", "AGG_J2E", "GUG_J2W"]
 
+# Roads whose vehicles are broadcast: the approach and exit edges, plus the
+# junction's internal lanes (":J0_*", matched by prefix)
+VIS_EDGES = frozenset(INCOMING_EDGES + OUTGOING_EDGES)
+
+# Approach names the Godot client keys per-approach data by, with their
+# incoming edge
+APPROACH_EDGES = (("north", "ACH_N2J"), ("south", "ACH_S2J"),
+                  ("east",  "AGG_E2J"), ("west",  "GUG_W2J"))
+
+# Crossing positions in the TL signal string.  After the lane-restricted
+# rebuild it is 20 chars (16 vehicle links + 4 crossings); crossings occupy
+# positions 16-19 in order: c0=N, c1=E, c2=S, c3=W.
+CROSSING_SLOTS = (("north", 16), ("east", 17), ("south", 18), ("west", 19))
+
+# Vehicle variables pushed by the junction context subscription
+# (see _subscribe_vehicles)
+_VEH_VARS = (tc.VAR_POSITION, tc.VAR_SPEED, tc.VAR_ANGLE,
+             tc.VAR_TYPE, tc.VAR_ROAD_ID)
+
 
 # ── Simulation modes ────────────────────────────────────────────────────────
 
@@ -152,6 +183,12 @@ class BaselineTimer:
 # Set of currently connected WebSocket clients
 connected_clients: set = set()
 
+# websockets.broadcast() has no backpressure: frames for a client that stops
+# reading pile up in its write buffer.  Past this many unsent bytes (~30
+# full frames) the client is dropped instead; the Godot client reconnects
+# and every frame is a full snapshot, so it resumes cleanly.
+MAX_CLIENT_BACKLOG = 1 << 20
+
 # Pending manual override from Godot UI (consumed by simulation loop)
 # Format: {"target_phase": int, "approach": str} or None
 pending_override: dict | None = None
@@ -238,67 +275,72 @@ async def broadcast(packet: dict):
     """
     Send a JSON packet to all connected WebSocket clients.
 
-    Uses websockets.broadcast() for efficient delivery.
-    Silently handles disconnected clients.
+    The packet is encoded once for all clients and handed to
+    websockets.broadcast(), which silently skips disconnected ones; clients
+    whose send backlog passed MAX_CLIENT_BACKLOG are closed first.  With
+    orjson it goes out as a binary frame of UTF-8 JSON (the Godot client
+    decodes both frame kinds the same way).
     """
     if not connected_clients:
         return
-    message = json.dumps(packet)
+    for ws in [ws for ws in connected_clients
+               if ws.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG]:
+        connected_clients.discard(ws)
+        print("[WS] Dropping slow client (send backlog over "
+              f"{MAX_CLIENT_BACKLOG >> 20} MiB)")
+        asyncio.create_task(ws.close(code=1011, reason="client too slow"))
+    message = orjson.dumps(packet) if orjson is not None else json.dumps(packet)
     websockets.broadcast(connected_clients, message)
 
 
 # ── Per-vehicle data collection ─────────────────────────────────────────────
 
+def _subscribe_vehicles() -> None:
+    """
+    Context-subscribe the junction to every vehicle within reach of the
+    broadcast edges, so SUMO pushes their position / speed / angle / type /
+    road with each simulationStep.  The radius is the farthest lane-shape
+    point of VIS_EDGES from the junction, so no vehicle on them is cut off.
+    Subscriptions die with SUMO, so this runs after every env.reset().
+    """
+    jx, jy = traci.junction.getPosition(TL_ID)
+    radius = 0.0
+    for edge in VIS_EDGES:
+        try:
+            n_lanes = traci.edge.getLaneNumber(edge)
+        except traci.exceptions.TraCIException:
+            continue  # Edge not in this network
+        for idx in range(n_lanes):
+            for x, y in traci.lane.getShape(f"{edge}_{idx}"):
+                radius = max(radius, math.hypot(x - jx, y - jy))
+    traci.junction.subscribeContext(
+        TL_ID, tc.CMD_GET_VEHICLE_VARIABLE, radius + 1.0, _VEH_VARS)
+
+
 def _collect_vehicle_data() -> list[dict]:
     """
     Collect position, speed, angle, and type for every vehicle
     near the junction (incoming edges, outgoing edges, and internal
     junction lanes).  Returns a list of dicts suitable for JSON.
+
+    One bulk read of the junction's context subscription — no per-vehicle
+    getter calls; vehicles in the radius but on other roads are dropped.
     """
     vehicles: list[dict] = []
-    seen: set[str] = set()
-
-    # Scan incoming + outgoing edges
-    for edge in INCOMING_EDGES + OUTGOING_EDGES:
-        try:
-            for vid in traci.edge.getLastStepVehicleIDs(edge):
-                if vid in seen:
-                    continue
-                seen.add(vid)
-                x, y = traci.vehicle.getPosition(vid)
-                vehicles.append({
-                    "id":    vid,
-                    "x":     round(x, 2),
-                    "y":     round(y, 2),
-                    "speed": round(traci.vehicle.getSpeed(vid), 2),
-                    "angle": round(traci.vehicle.getAngle(vid), 1),
-                    "type":  traci.vehicle.getTypeID(vid),
-                    "edge":  edge,
-                })
-        except traci.exceptions.TraCIException:
-            pass
-
-    # Also capture vehicles traversing the junction (internal edges :J0_*)
-    try:
-        for vid in traci.vehicle.getIDList():
-            if vid in seen:
-                continue
-            road = traci.vehicle.getRoadID(vid)
-            if road.startswith(":J0"):
-                seen.add(vid)
-                x, y = traci.vehicle.getPosition(vid)
-                vehicles.append({
-                    "id":    vid,
-                    "x":     round(x, 2),
-                    "y":     round(y, 2),
-                    "speed": round(traci.vehicle.getSpeed(vid), 2),
-                    "angle": round(traci.vehicle.getAngle(vid), 1),
-                    "type":  traci.vehicle.getTypeID(vid),
-                    "edge":  road,
-                })
-    except traci.exceptions.TraCIException:
-        pass
-
+    res = traci.junction.getContextSubscriptionResults(TL_ID) or {}
+    for vid, r in res.items():
+        road = r[tc.VAR_ROAD_ID]
+        if road in VIS_EDGES or road.startswith(":J0"):
+            x, y = r[tc.VAR_POSITION]
+            vehicles.append({
+                "id":    vid,
+                "x":     round(x, 2),
+                "y":     round(y, 2),
+                "speed": round(r[tc.VAR_SPEED], 2),
+                "angle": round(r[tc.VAR_ANGLE], 1),
+                "type":  r[tc.VAR_TYPE],
+                "edge":  road,
+            })
     return vehicles
 
 
@@ -386,6 +428,23 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
     # Set the active control mode (can be changed at runtime via WebSocket)
     active_control_mode = mode
 
+    # ── Frame pacing ─────────────────────────────────────────────────────
+    # One frame per sim-second on a fixed schedule of the loop's monotonic
+    # clock, so per-frame overhead doesn't accumulate as drift
+    loop = asyncio.get_running_loop()
+    frame_dt = 1.0 / speed
+    next_tick = loop.time()
+
+    async def wait_next_frame() -> None:
+        """Sleep until the next frame slot."""
+        nonlocal next_tick
+        next_tick += frame_dt
+        delay = next_tick - loop.time()
+        if delay < -0.5:
+            # Over half a second behind (overload): resync, don't burst
+            next_tick = loop.time()
+        await asyncio.sleep(max(0.0, delay))
+
     # ── Initialise SUMO environment ──────────────────────────────────────
     env = TrafficEnv(gui=False, verbose=False)
     run_count = 0
@@ -395,6 +454,7 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
             # Reset the simulation
             seed = 42 + run_count * 137
             state = env.reset(seed=seed)
+            _subscribe_vehicles()
             run_count += 1
             print(f"\n[SIM] Run #{run_count} started (seed={seed})")
 
@@ -403,13 +463,12 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
                 "run": run_count,
                 "seed": seed,
             })
+            next_tick = loop.time()
 
             done = False
             step_count = 0
 
             while not done:
-                decision_start = time.time()
-
                 # ── Check for runtime mode switch ─────────────────────
                 if pending_mode_switch is not None:
                     new_mode = pending_mode_switch
@@ -474,8 +533,6 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
                 sub_step_done = False
 
                 for sub in range(DECISION_INTERVAL):
-                    sub_start = time.time()
-
                     # Handle yellow countdown
                     if env._in_yellow:
                         env._yellow_countdown -= 1
@@ -486,48 +543,53 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
                     env._sim_step += 1
                     env._phase_timer += 1
 
-                    block_arrived += traci.simulation.getArrivedNumber()
+                    # Arrived / still-expected counts come from TrafficEnv's
+                    # simulation subscription, pushed with each step
+                    sim_res = traci.simulation.getSubscriptionResults()
+                    block_arrived += sim_res[tc.VAR_ARRIVED_VEHICLES_NUMBER]
 
-                    # Broadcast vehicle positions every sim-second
-                    vehicle_data = _collect_vehicle_data()
-                    ped_data = _collect_pedestrian_data()
-                    await broadcast({
-                        "type": "vehicle_update",
-                        "vehicles": vehicle_data,
-                        "pedestrians": ped_data,
-                        "sim_time": env._sim_step,
-                    })
+                    # Vehicle / pedestrian data only feeds the broadcasts, so
+                    # with no client attached it isn't collected at all
+                    viewers = bool(connected_clients)
+                    if viewers:
+                        vehicle_data = _collect_vehicle_data()
+                        ped_data = _collect_pedestrian_data()
 
                     # Check early termination
-                    if traci.simulation.getMinExpectedNumber() == 0:
+                    if sim_res[tc.VAR_MIN_EXPECTED_VEHICLES] == 0:
                         sub_step_done = True
                         break
+                    # The decision's last second goes out inside the
+                    # state_update below (same vehicles / pedestrians), so
+                    # it is not also sent as a vehicle_update
+                    if sub == DECISION_INTERVAL - 1:
+                        break
 
-                    # Sleep 1 sim-second of real time (divided by speed)
-                    sub_elapsed = time.time() - sub_start
-                    sub_sleep = max(0.005, (1.0 / speed) - sub_elapsed)
-                    await asyncio.sleep(sub_sleep)
+                    # Broadcast vehicle positions every sim-second
+                    if viewers:
+                        await broadcast({
+                            "type": "vehicle_update",
+                            "vehicles": vehicle_data,
+                            "pedestrians": ped_data,
+                            "sim_time": env._sim_step,
+                        })
+
+                    # Wait out 1 sim-second of real time (divided by speed)
+                    await wait_next_frame()
 
                 # --- Phase 3: Collect end-of-decision metrics (same as env.step end) ---
                 edge_metrics = env._collect_edge_metrics()
 
                 # Update env internal accumulators (normally done inside step)
-                final_queues = []
-                final_waits = []
-                for edge in INCOMING_EDGES:
-                    final_queues.append(edge_metrics[edge]["queue"])
-                    final_waits.append(edge_metrics[edge]["wait"])
+                final_queues = [edge_metrics[edge]["queue"] for edge in INCOMING_EDGES]
+                final_waits  = [edge_metrics[edge]["wait"]  for edge in INCOMING_EDGES]
 
                 total_queue = float(sum(final_queues))
                 env.total_arrived += block_arrived
 
                 # Count pedestrians waiting at crossings
-                total_ped_waiting = 0
-                for wa in WALKING_AREAS:
-                    try:
-                        total_ped_waiting += len(traci.edge.getLastStepPersonIDs(wa))
-                    except traci.exceptions.TraCIException:
-                        pass
+                ped_counts = env._get_pedestrian_counts()
+                total_ped_waiting = int(sum(ped_counts))
 
                 reward = env._compute_reward(
                     total_queue=total_queue,
@@ -545,95 +607,91 @@ async def simulation_loop(mode: str, model_path: Path, speed: float):
                 env._prev_total_queue = total_queue
 
                 avg_wait = float(np.mean(final_waits)) if final_waits else 0.0
-                env.episode_rewards.append(reward)
-                env.episode_queues.append(total_queue)
-                env.episode_waits.append(avg_wait)
+                env._record_block(reward, total_queue, avg_wait)
 
                 done = (
                     env._sim_step >= SIM_DURATION
                     or sub_step_done
                 )
-                next_state = env._build_state()
-
-                vehicle_data = _collect_vehicle_data()
-
-                # Collect per-lane sensor data for visualiser overlays
-                lane_metrics = env._collect_lane_metrics()
-                lane_data = {}
-                for lane_id in INCOMING_LANES:
-                    lm = lane_metrics[lane_id]
-                    lane_data[lane_id] = {
-                        "queue": int(lm["queue"]),
-                        "speed": round(lm["speed"], 2),
-                        "wait":  round(lm["wait"], 1),
+                next_state = env._build_state(edge_metrics, ped_counts)
+
+                # The state_update is built only for connected clients.  No
+                # await separates this from the last sub-step, so `viewers`
+                # still holds and vehicle_data / ped_data are current.
+                if viewers:
+                    # Collect per-lane sensor data for visualiser overlays
+                    lane_metrics = env._collect_lane_metrics()
+                    lane_data = {}
+                    for lane_id in INCOMING_LANES:
+                        lm = lane_metrics[lane_id]
+                        lane_data[lane_id] = {
+                            "queue": int(lm["queue"]),
+                            "speed": round(lm["speed"], 2),
+                            "wait":  round(lm["wait"], 1),
+                        }
+
+                    # ── Build full state broadcast packet ─────────────────
+                    signal = PHASE_SIGNALS.get(env._phase, "r" * 20)
+                    packet = {
+                        "type": "state_update",
+                        "control_mode": active_control_mode,
+
+                        # Timing
+                        "step": env._sim_step,
+                        "sim_time": env._sim_step,
+
+                        # Phase state
+                        "phase": env._phase,
+                        "phase_name": PHASE_NAMES.get(env._phase, "UNKNOWN"),
+                        "phase_timer": env._phase_timer,
+                        "in_yellow": env._in_yellow,
+
+                        # Per-approach queues
+                        "queues": {
+                            name: edge_metrics[edge]["queue"]
+                            for name, edge in APPROACH_EDGES
+                        },
+
+                        # Per-approach wait times
+                        "wait_times": {
+                            name: round(edge_metrics[edge]["wait"], 1)
+                            for name, edge in APPROACH_EDGES
+                        },
+
+                        # Aggregate stats
+                        "vehicles_completed": env.total_arrived,
+                        "avg_wait": round(env.episode_avg_wait, 1),
+
+                        # AI decision
+                        "ai_decision": ACTION_NAMES[action] if action < len(ACTION_NAMES) else "UNKNOWN",
+                        "reward": round(reward, 1),
+                        "total_reward": round(env.episode_total_reward, 1),
+
+                        # Per-vehicle positions
+                        "vehicles": vehicle_data,
+
+                        # Per-lane sensor data (for congestion overlays)
+                        "lane_data": lane_data,
+
+                        # Pedestrian data
+                        "pedestrians": ped_data,
+
+                        # Crossing signal states (for visualizer crosswalk lights)
+                        "crossing_green": {
+                            name: signal[pos] in "Gg"
+                            for name, pos in CROSSING_SLOTS
+                        },
+
+                        # Meta
+                        "mode": mode,
+                        "done": done,
                     }
 
-                # ── Build full state broadcast packet ─────────────────────
-                packet = {
-                    "type": "state_update",
-                    "control_mode": active_control_mode,
-
-                    # Timing
-                    "step": env._sim_step,
-                    "sim_time": env._sim_step,
-
-                    # Phase state
-                    "phase": env._phase,
-                    "phase_name": PHASE_NAMES.get(env._phase, "UNKNOWN"),
-                    "phase_timer": env._phase_timer,
-                    "in_yellow": env._in_yellow,
-
-                    # Per-approach queues
-                    "queues": {
-                        "north": edge_metrics["ACH_N2J"]["queue"],
-                        "south": edge_metrics["ACH_S2J"]["queue"],
-                        "east":  edge_metrics["AGG_E2J"]["queue"],
-                        "west":  edge_metrics["GUG_W2J"]["queue"],
-                    },
-
-                    # Per-approach wait times
-                    "wait_times": {
-                        "north": round(edge_metrics["ACH_N2J"]["wait"], 1),
-                        "south": round(edge_metrics["ACH_S2J"]["wait"], 1),
-                        "east":  round(edge_metrics["AGG_E2J"]["wait"], 1),
-                        "west":  round(edge_metrics["GUG_W2J"]["wait"], 1),
-                    },
-
-                    # Aggregate stats
-                    "vehicles_completed": env.total_arrived,
-                    "avg_wait": round(env.episode_avg_wait, 1),
-
-                    # AI decision
-                    "ai_decision": ACTION_NAMES[action] if action < len(ACTION_NAMES) else "UNKNOWN",
-                    "reward": round(reward, 1),
-                    "total_reward": round(env.episode_total_reward, 1),
-
-                    # Per-vehicle positions
-                    "vehicles": vehicle_data,
-
-                    # Per-lane sensor data (for congestion overlays)
-                    "lane_data": lane_data,
-
-                    # Pedestrian data
-                    "pedestrians": _collect_pedestrian_data(),
-
-                    # Crossing signal states (for visualizer crosswalk lights).
-                    # After the lane-restricted rebuild, the TL signal string is
-                    # 20 chars (16 vehicle links + 4 crossings). Crossings occupy
-                    # positions 16-19 in order: c0=N, c1=E, c2=S, c3=W.
-                    "crossing_green": {
-                        "north": PHASE_SIGNALS.get(env._phase, "r" * 20)[16] in "Gg",
-                        "east":  PHASE_SIGNALS.get(env._phase, "r" * 20)[17] in "Gg",
-                        "south": PHASE_SIGNALS.get(env._phase, "r" * 20)[18] in "Gg",
-                        "west":  PHASE_SIGNALS.get(env._phase, "r" * 20)[19] in "Gg",
-                    },
-
-                    # Meta
-                    "mode": mode,
-                    "done": done,
-                }
-
-                await broadcast(packet)
+                    await broadcast(packet)
+
+                # Hold the final sub-step's second here, after its frame
+                if not done:
+                    await wait_next_frame()
 
                 state = next_state
                 step_count += 1
@@ -694,8 +752,11 @@ async def main(args):
     print("  Open the Godot project in visualizer/ and press F5.")
     print()
 
-    # Start WebSocket server, then run simulation loop
-    async with websockets.serve(ws_handler, "localhost", args.port):
+    # Start WebSocket server, then run simulation loop.  permessage-deflate
+    # is off: every frame is broadcast unchanged to all clients, and deflate
+    # would compress it again separately for each one.
+    async with websockets.serve(ws_handler, "localhost", args.port,
+                                compression=None):
         await simulation_loop(mode, model_path, args.speed)
 
 
@@ -731,7 +792,17 @@ if __name__ == "__main__":
     )
 
     args = parser.parse_args()
+
+    # uvloop (optional, not on Windows) is a drop-in libuv event loop with
+    # less per-callback overhead than the stdlib loop
+    run = asyncio.run
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        pass
+
     try:
-        asyncio.run(main(args))
+        run(main(args))
     except KeyboardInterrupt:
         print("\n[SERVER] Stopped.")